@@ -1,28 +1,72 @@
 from django.contrib import admin
-from import_export import resources
+from elearning.resources import BulkModelResource
 from import_export.admin import ImportExportModelAdmin
+from progress.models import CourseProgress
 from .models import Course, Module, Lesson
+from .outline import touch_courses
 
-class CourseResource(resources.ModelResource):
+class CourseResource(BulkModelResource):
     class Meta:
         model = Course
         fields = ('id', 'title', 'description', 'instructor', 'thumbnail', 'price',
                  'is_published', 'created_at', 'updated_at')
         export_order = fields
 
-class ModuleResource(resources.ModelResource):
+class CourseContentResource(BulkModelResource):
+    # Bulk writes bypass the Module/Lesson signals that keep
+    # Course.total_lessons and the cached course outlines current, so the
+    # courses an import touched are recounted and re-versioned afterwards,
+    # along with their students' progress. `parent_field` is the foreign key
+    # the rows hang off; a course id unless get_touched_course_ids says otherwise.
+    parent_field = 'course_id'
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.touched_parent_ids = set()
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        # Where an existing row hangs before the import moves it
+        if not new:
+            self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def before_delete_instance(self, instance, row, **kwargs):
+        super().before_delete_instance(instance, row, **kwargs)
+        self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def get_touched_course_ids(self):
+        return self.touched_parent_ids - {None}
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get('dry_run'):
+            course_ids = self.get_touched_course_ids()
+            Course.objects.filter(pk__in=course_ids).recount_total_lessons()
+            CourseProgress.objects.filter(course_id__in=course_ids).reconcile()
+            touch_courses(*course_ids)
+
+class ModuleResource(CourseContentResource):
     class Meta:
         model = Module
         fields = ('id', 'course', 'title', 'description', 'order', 'created_at', 'updated_at')
         export_order = fields
 
-class LessonResource(resources.ModelResource):
+class LessonResource(CourseContentResource):
+    parent_field = 'module_id'
+
     class Meta:
         model = Lesson
         fields = ('id', 'module', 'title', 'content', 'video_url', 'duration',
                  'order', 'created_at', 'updated_at')
         export_order = fields
 
+    def get_touched_course_ids(self):
+        return set(Module.objects.filter(pk__in=self.touched_parent_ids).values_list('course_id', flat=True))
+
 @admin.register(Course)
 class CourseAdmin(ImportExportModelAdmin):
     resource_class = CourseResource
@@ -0,0 +1,99 @@
+"""
+Course enrollment analytics.
+
+Enrollments are rolled up per course per day into CourseEnrollmentDaily as
+they happen (see courses.signals), so trend charts read a few hundred
+rollup rows however many years of enrollments a course has.
+``rebuild_enrollment_rollups`` recomputes the rollups from CourseEnrollment
+(``manage.py rebuild_enrollment_rollups``).
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Sum, Value
+from django.db.models.functions import Greatest, TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import CourseEnrollment, CourseEnrollmentDaily, CourseRating
+
+TREND_PERIODS = ('month', 'day')
+
+
+def enrollment_days(enrollments):
+    """Count ``enrollments`` (a CourseEnrollment queryset) by (course_id, day)."""
+    return Counter({
+        (row['course_id'], row['day']): row['total']
+        for row in enrollments.order_by().values('course_id', day=TruncDate('enrollment_date')).annotate(
+            total=Count('pk')
+        )
+    })
+
+
+def adjust_enrollment_rollups(deltas):
+    """Apply ``{(course_id, day): delta}`` to the daily rollups."""
+    for (course_id, day), delta in deltas.items():
+        if not delta:
+            continue
+        rollup = CourseEnrollmentDaily.objects.filter(course_id=course_id, day=day)
+        if rollup.update(enrollments=Greatest(F('enrollments') + delta, Value(0))) or delta < 0:
+            continue
+        try:
+            with transaction.atomic():
+                CourseEnrollmentDaily.objects.create(course_id=course_id, day=day, enrollments=delta)
+        except IntegrityError:
+            # Created concurrently since the update above
+            rollup.update(enrollments=F('enrollments') + delta)
+
+
+def rebuild_enrollment_rollups(courses):
+    """Recompute the rollups of ``courses`` (a Course queryset) from CourseEnrollment."""
+    counts = enrollment_days(CourseEnrollment.objects.filter(course__in=courses))
+    with transaction.atomic():
+        CourseEnrollmentDaily.objects.filter(course__in=courses).delete()
+        CourseEnrollmentDaily.objects.bulk_create(
+            [CourseEnrollmentDaily(course_id=course_id, day=day, enrollments=total)
+             for (course_id, day), total in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+def enrollment_trend(course, period='month', since=None):
+    """
+    Enrollments per calendar month (or day) from ``since`` (a date) on, as
+    ``[{'period': date, 'count': n}]`` with months keyed by their first day.
+    """
+    rollups = CourseEnrollmentDaily.objects.filter(course=course)
+    if since is not None:
+        rollups = rollups.filter(day__gte=since)
+    if period == 'day':
+        return [
+            {'period': day, 'count': total}
+            for day, total in rollups.order_by('day').values_list('day', 'enrollments')
+        ]
+    return [
+        {'period': row['period'], 'count': row['count']}
+        for row in rollups.order_by().values(period=TruncMonth('day')).annotate(
+            count=Sum('enrollments')
+        ).order_by('period')
+    ]
+
+
+def recent_enrollments(course, days=30):
+    since = timezone.localdate() - timezone.timedelta(days=days - 1)
+    return CourseEnrollmentDaily.objects.filter(course=course, day__gte=since).aggregate(
+        total=Sum('enrollments')
+    )['total'] or 0
+
+
+def course_summary(course):
+    total_students = CourseEnrollment.objects.filter(course=course).count()
+    average_rating = CourseRating.objects.filter(course=course).aggregate(
+        avg_rating=Avg('rating')
+    )['avg_rating'] or 0
+    return {
+        'total_students': total_students,
+        # Free courses have no price
+        'total_revenue': (course.price or 0) * total_students,
+        'average_rating': average_rating,
+    }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from courses.analytics import rebuild_enrollment_rollups
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily course enrollment rollups from CourseEnrollment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append',
+                            help='Only rebuild this course (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Courses rebuilt per transaction')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk')
+        if options['course']:
+            courses = courses.filter(pk__in=options['course'])
+        course_ids = list(courses.values_list('pk', flat=True))
+
+        batch_size = options['batch_size']
+        rows = 0
+        for start in range(0, len(course_ids), batch_size):
+            rows += rebuild_enrollment_rollups(Course.objects.filter(pk__in=course_ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {rows} daily rollup row(s) for {len(course_ids)} course(s)'
+        ))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from courses.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from courses.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_passing_score'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
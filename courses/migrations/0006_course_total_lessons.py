@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:05
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_total_lessons(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('courses', 'Lesson')
+    lesson_count = Lesson.objects.filter(
+        module__course=OuterRef('pk')
+    ).order_by().values('module__course').annotate(total=Count('pk')).values('total')
+    Course.objects.update(total_lessons=Coalesce(Subquery(lesson_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='total_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_total_lessons, migrations.RunPython.noop),
+    ]
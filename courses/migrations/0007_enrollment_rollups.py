@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_enrollment_rollups(apps, schema_editor):
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+    CourseEnrollmentDaily = apps.get_model('courses', 'CourseEnrollmentDaily')
+    rows = CourseEnrollment.objects.order_by().values('course_id', day=TruncDate('enrollment_date')).annotate(
+        total=Count('pk')
+    )
+    CourseEnrollmentDaily.objects.bulk_create(
+        [CourseEnrollmentDaily(course_id=row['course_id'], day=row['day'], enrollments=row['total']) for row in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_total_lessons'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseEnrollmentDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('enrollments', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['course', 'enrollment_date'], name='enrollment_course_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='courseenrollmentdaily',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_enrollments', to='courses.course'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseenrollmentdaily',
+            unique_together={('course', 'day')},
+        ),
+        migrations.RunPython(backfill_enrollment_rollups, migrations.RunPython.noop),
+    ]
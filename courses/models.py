@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import Avg, Count, FloatField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.utils import timezone
 from .subjects.models import Subject
 
@@ -7,6 +10,54 @@ from .subjects.models import Subject
 
 
 
+class CourseQuerySet(models.QuerySet):
+    """
+    Builders that load everything CourseSerializer reads up front, so a page
+    of courses costs the same number of queries whatever its size.
+    """
+
+    def with_stats(self):
+        enrollment_count = CourseEnrollment.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course').annotate(total=Count('pk')).values('total')
+        average_rating = CourseRating.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course').annotate(avg=Avg('rating')).values('avg')
+        module_count = Module.objects.filter(
+            course=OuterRef('pk')
+        ).order_by().values('course').annotate(total=Count('pk')).values('total')
+        lesson_count = Lesson.objects.filter(
+            module__course=OuterRef('pk')
+        ).order_by().values('module__course').annotate(total=Count('pk')).values('total')
+        return self.select_related('instructor__examination_type', 'category').annotate(
+            enrollment_count=Coalesce(Subquery(enrollment_count), 0),
+            average_rating=Coalesce(Subquery(average_rating, output_field=FloatField()), 0.0),
+            module_count=Coalesce(Subquery(module_count), 0),
+            lesson_count=Coalesce(Subquery(lesson_count), 0),
+        )
+
+    def with_modules(self):
+        return self.prefetch_related(
+            Prefetch('modules', queryset=Module.objects.prefetch_related('lessons'))
+        )
+
+    def with_students(self):
+        User = get_user_model()
+        return self.prefetch_related(
+            Prefetch('students', queryset=User.objects.select_related('examination_type')),
+            Prefetch('ratings', queryset=User.objects.only('id')),
+        )
+
+    def with_related(self):
+        return self.with_stats().with_modules().with_students()
+
+    def recount_total_lessons(self):
+        lesson_count = Lesson.objects.filter(
+            module__course=OuterRef('pk')
+        ).order_by().values('module__course').annotate(total=Count('pk')).values('total')
+        return self.update(total_lessons=Coalesce(Subquery(lesson_count), 0))
+
+
 class Course(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
@@ -22,6 +73,10 @@ class Course(models.Model):
     thumbnail = models.ImageField(upload_to='course_thumbnails/', null=True, blank=True)
     is_published = models.BooleanField(default=False)
     ratings = models.ManyToManyField(settings.AUTH_USER_MODEL, through='CourseRating', related_name='rated_courses')
+    # Maintained by Lesson/Module signals (see courses.signals)
+    total_lessons = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CourseQuerySet.as_manager()
 
     def __str__(self):
         return self.title
@@ -99,10 +154,26 @@ class CourseEnrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # Per-course enrollment counts and trends over a date range
+            models.Index(fields=['course', 'enrollment_date'], name='enrollment_course_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student.username} - {self.course.title}"
 
+class CourseEnrollmentDaily(models.Model):
+    # Enrollments per course per day, kept by courses.analytics
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_enrollments')
+    day = models.DateField()
+    enrollments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'day')
+
+    def __str__(self):
+        return f"{self.course.title} - {self.day}: {self.enrollments}"
+
 class CourseRating(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
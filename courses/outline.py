@@ -0,0 +1,48 @@
+"""
+Cached course outlines.
+
+An outline is a course's modules and lessons (ids and titles, in display
+order) as plain tuples, built with one query and kept in Django's cache under
+the course's ``updated_at``, so a stale outline is never read. Module and
+Lesson signals (see courses.signals) bump ``updated_at`` whenever the outline
+could change; code that bypasses signals (bulk writes) calls ``touch_courses``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Course, Module
+
+
+def course_outline_cache_key(course):
+    return f'courses:outline:{course.pk}:{int(course.updated_at.timestamp() * 1000000)}'
+
+
+def build_course_outline(course_id):
+    rows = Module.objects.filter(course_id=course_id).order_by(
+        'order', 'id', 'lessons__order', 'lessons__id'
+    ).values_list('id', 'title', 'lessons__id', 'lessons__title')
+    modules = {}
+    for module_id, module_title, lesson_id, lesson_title in rows:
+        lessons = modules.setdefault(module_id, (module_title, []))[1]
+        if lesson_id is not None:
+            lessons.append((lesson_id, lesson_title))
+    return tuple(
+        (module_id, title, tuple(lessons))
+        for module_id, (title, lessons) in modules.items()
+    )
+
+
+def get_course_outline(course):
+    """Return ``((module_id, title, ((lesson_id, title), ...)), ...)`` for ``course``."""
+    cache_key = course_outline_cache_key(course)
+    outline = cache.get(cache_key)
+    if outline is None:
+        outline = build_course_outline(course.pk)
+        cache.set(cache_key, outline, settings.COURSE_OUTLINE_CACHE_TIMEOUT)
+    return outline
+
+
+def touch_courses(*course_ids):
+    """Move the courses to a new version so their cached outlines are dropped."""
+    Course.objects.filter(pk__in=course_ids).update(updated_at=timezone.now())
@@ -0,0 +1,188 @@
+"""
+Full-text search over course titles and descriptions.
+
+On PostgreSQL courses_course carries a trigger-maintained ``search_vector``
+tsvector column behind a GIN index. On SQLite an external-content FTS5 table
+is kept in sync with the course table by triggers. Both are installed by
+``install_search_index`` (from migrations and again after every migrate, since
+SQLite table rebuilds drop triggers). Other backends fall back to icontains.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'courses_course_fts'
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+POSTGRES_INSTALL = [
+    "ALTER TABLE courses_course ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION courses_course_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course",
+    """
+    CREATE TRIGGER courses_course_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON courses_course
+    FOR EACH ROW EXECUTE FUNCTION courses_course_search_vector_update()
+    """,
+    "UPDATE courses_course SET title = title WHERE search_vector IS NULL",
+    "CREATE INDEX IF NOT EXISTS courses_course_search_vector_gin ON courses_course USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS courses_course_search_vector_trigger ON courses_course",
+    "DROP FUNCTION IF EXISTS courses_course_search_vector_update()",
+    "DROP INDEX IF EXISTS courses_course_search_vector_gin",
+    "ALTER TABLE courses_course DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='courses_course', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+"""
+
+SQLITE_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON courses_course BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON courses_course BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON courses_course BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+]
+
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# Per-alias cache of whether the search index exists on that database
+_available = {}
+
+
+def install_search_index(connection):
+    _available.pop(connection.alias, None)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRES_INSTALL:
+                cursor.execute(statement)
+        elif connection.vendor == 'sqlite':
+            try:
+                cursor.execute(SQLITE_TABLE)
+            except OperationalError:
+                # SQLite built without FTS5; searches use the icontains fallback
+                return
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f'{FTS_TABLE}_a_'],
+            )
+            if cursor.fetchone()[0] < len(SQLITE_TRIGGERS):
+                # Fresh install or the course table was rebuilt: reinstall the
+                # triggers and reindex whatever changed while they were missing.
+                for statement in SQLITE_TRIGGERS:
+                    cursor.execute(statement)
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(connection):
+    _available.pop(connection.alias, None)
+    statements = {
+        'postgresql': POSTGRES_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def search_index_available(connection):
+    if connection.alias not in _available:
+        if connection.vendor == 'postgresql':
+            sql = ("SELECT 1 FROM information_schema.columns "
+                   "WHERE table_name = 'courses_course' AND column_name = 'search_vector'")
+        elif connection.vendor == 'sqlite':
+            sql = f"SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = '{FTS_TABLE}'"
+        else:
+            _available[connection.alias] = False
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            _available[connection.alias] = cursor.fetchone() is not None
+    return _available[connection.alias]
+
+
+def search_terms(query):
+    return [term.lower() for term in TERM_RE.findall(query or '')]
+
+
+def search_courses(queryset, query):
+    """
+    Filter a Course queryset down to matches for ``query``, annotated with
+    ``search_rank`` and ordered best match first. The last term is matched as
+    a prefix so results show up while the user is still typing.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+
+    connection = connections[queryset.db]
+    if not search_index_available(connection):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(description__icontains=query)
+        )
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+        return queryset.alias(
+            search_match=RawSQL(
+                "courses_course.search_vector @@ to_tsquery('pg_catalog.english', %s)",
+                (tsquery,), output_field=BooleanField()
+            )
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(
+                "ts_rank(courses_course.search_vector, to_tsquery('pg_catalog.english', %s))",
+                (tsquery,), output_field=FloatField()
+            )
+        ).order_by('-search_rank', 'pk')
+
+    # FTS5: quoted terms are ANDed, the trailing * makes the last one a prefix.
+    # bm25() is lower-is-better, so it is negated to match ts_rank's direction;
+    # it needs the MATCH in its own query, hence the per-match subquery.
+    match = ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    ).annotate(
+        search_rank=RawSQL(
+            f"SELECT -bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = courses_course.id",
+            (match,), output_field=FloatField()
+        )
+    ).order_by('-search_rank', 'pk')
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.db.models import Avg
 from .models import Course, CourseEnrollment, CourseRating, Module, Lesson, Assignment, AssignmentQuestion, AssignmentChoice, AssignmentSubmission, AssignmentAnswer
 from users.serializers import UserProfileSerializer
 
@@ -20,20 +21,49 @@ class CourseSerializer(serializers.ModelSerializer):
     modules = ModuleSerializer(many=True, read_only=True)
     enrollment_count = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
+
+    # Heavy nested fields a view can leave out by passing an `expand` set in the
+    # serializer context; without one every field is rendered.
+    expandable_fields = ('modules', 'students')
     
     class Meta:
         model = Course
         fields = '__all__'
         read_only_fields = ('instructor', 'students')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand')
+        if expand is not None:
+            for field_name in self.expandable_fields:
+                if field_name not in expand:
+                    self.fields.pop(field_name, None)
     
     def get_enrollment_count(self, obj):
+        # Annotated by Course.objects.with_stats(); fall back for bare instances
+        if hasattr(obj, 'enrollment_count'):
+            return obj.enrollment_count
         return obj.students.count()
     
     def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if ratings:
-            return sum(rating.rating for rating in ratings) / len(ratings)
-        return 0
+        if hasattr(obj, 'average_rating'):
+            return obj.average_rating
+        return CourseRating.objects.filter(course=obj).aggregate(
+            avg_rating=Avg('rating')
+        )['avg_rating'] or 0
+
+class CourseListSerializer(serializers.ModelSerializer):
+    # Compact card representation; expects Course.objects.with_stats()
+    category_name = serializers.CharField(source='category.name', read_only=True)
+    enrollment_count = serializers.IntegerField(read_only=True)
+    module_count = serializers.IntegerField(read_only=True)
+    lesson_count = serializers.IntegerField(read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ('id', 'title', 'category', 'category_name', 'enrollment_count',
+                 'module_count', 'lesson_count', 'average_rating', 'thumbnail')
 
 class CourseCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,6 +79,25 @@ class CourseEnrollmentSerializer(serializers.ModelSerializer):
         model = CourseEnrollment
         fields = '__all__'
 
+class CourseRosterSerializer(serializers.ModelSerializer):
+    # One enrolled student; expects select_related('student')
+    id = serializers.IntegerField(source='student.id', read_only=True)
+    username = serializers.CharField(source='student.username', read_only=True)
+    email = serializers.EmailField(source='student.email', read_only=True)
+
+    class Meta:
+        model = CourseEnrollment
+        fields = ('id', 'username', 'email', 'enrollment_date')
+
+class StaffCourseRosterSerializer(CourseRosterSerializer):
+    first_name = serializers.CharField(source='student.first_name', read_only=True)
+    last_name = serializers.CharField(source='student.last_name', read_only=True)
+    enrolled_at = serializers.DateTimeField(source='enrollment_date', read_only=True)
+
+    class Meta:
+        model = CourseEnrollment
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'enrolled_at')
+
 class CourseRatingSerializer(serializers.ModelSerializer):
     class Meta:
         model = CourseRating
@@ -0,0 +1,116 @@
+from collections import Counter
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from elearning.signals import deleted_via
+from .analytics import adjust_enrollment_rollups
+from .models import Course, CourseEnrollment, Lesson, Module
+from .outline import touch_courses
+from .search import install_search_index
+
+
+@receiver(post_migrate)
+def ensure_course_search_index(sender, using='default', **kwargs):
+    # SQLite rebuilds a table for most ALTERs and drops its triggers with it,
+    # so re-check the full-text index after every migrate.
+    if sender.name == 'courses':
+        connection = connections[using]
+        applied = MigrationRecorder(connection).applied_migrations()
+        if ('courses', '0005_course_search_index') in applied:
+            install_search_index(connection)
+
+
+# Every Lesson/Module change below also bumps Course.updated_at, which
+# versions the cached outline (see courses.outline)
+
+def _adjust_total_lessons(module_id, delta):
+    Course.objects.filter(modules__id=module_id).update(
+        total_lessons=Greatest(F('total_lessons') + delta, Value(0)),
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_module(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_module_id = Lesson.objects.filter(pk=instance.pk).values_list(
+            'module_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    if created:
+        _adjust_total_lessons(instance.module_id, 1)
+        return
+    previous_module_id = getattr(instance, '_previous_module_id', None)
+    if previous_module_id is not None and previous_module_id != instance.module_id:
+        _adjust_total_lessons(previous_module_id, -1)
+        _adjust_total_lessons(instance.module_id, 1)
+    else:
+        Course.objects.filter(modules__id=instance.module_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, origin=None, **kwargs):
+    # Module deletes recount once below; course deletes need nothing
+    if not deleted_via(origin, Module, Course):
+        _adjust_total_lessons(instance.module_id, -1)
+
+
+@receiver(pre_save, sender=Module)
+def remember_module_course(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._previous_course_id = Module.objects.filter(pk=instance.pk).values_list(
+            'course_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Module)
+def module_saved(sender, instance, created, **kwargs):
+    previous_course_id = getattr(instance, '_previous_course_id', None)
+    if previous_course_id is not None and previous_course_id != instance.course_id:
+        # The module took its lessons along
+        Course.objects.filter(pk__in=[previous_course_id, instance.course_id]).recount_total_lessons()
+        touch_courses(previous_course_id, instance.course_id)
+    else:
+        touch_courses(instance.course_id)
+
+
+@receiver(post_delete, sender=Module)
+def module_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_via(origin, Course):
+        Course.objects.filter(pk=instance.course_id).recount_total_lessons()
+        touch_courses(instance.course_id)
+
+
+# Daily enrollment rollups (see courses.analytics)
+
+@receiver(post_save, sender=CourseEnrollment)
+def enrollment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_enrollment_rollups({(instance.course_id, timezone.localdate(instance.enrollment_date)): 1})
+
+
+@receiver(post_delete, sender=CourseEnrollment)
+def enrollment_deleted(sender, instance, origin=None, **kwargs):
+    # Also sent for course.students.remove()/clear(); a deleted course takes
+    # its rollups with it
+    if not deleted_via(origin, Course):
+        adjust_enrollment_rollups({(instance.course_id, timezone.localdate(instance.enrollment_date)): -1})
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def students_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # course.students.add() bulk-creates enrollments, dated now, without post_save
+    if action != 'post_add' or not pk_set:
+        return
+    today = timezone.localdate()
+    course_ids = pk_set if reverse else [instance.pk] * len(pk_set)
+    adjust_enrollment_rollups(Counter((course_id, today) for course_id in course_ids))
@@ -1,3 +1,156 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+from tablib import Dataset
 
-# Create your tests here.
+from courses.subjects.models import Subject
+from progress.admin import CourseProgressResource
+from progress.models import CourseProgress
+from .admin import LessonResource, ModuleResource
+from .models import Course, Lesson, Module
+from .search import install_search_index, search_courses, search_index_available, uninstall_search_index
+
+User = get_user_model()
+
+LESSON_HEADERS = ['id', 'module', 'title', 'content', 'video_url', 'duration', 'order']
+
+
+class DeletingLessonResource(LessonResource):
+    def for_delete(self, row, instance):
+        return row.get('delete') == '1'
+
+
+class CourseContentImportTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(username='teacher', password='x', user_type='teacher')
+        self.student = User.objects.create_user(username='student', password='x', user_type='student')
+        subject, _ = Subject.objects.get_or_create(name='Mathematics')
+        self.algebra = Course.objects.create(title='Algebra', description='Algebra', instructor=instructor, category=subject)
+        self.geometry = Course.objects.create(title='Geometry', description='Geometry', instructor=instructor, category=subject)
+        self.module = Module.objects.create(course=self.algebra, title='Basics', description='Basics', order=1)
+        self.other_module = Module.objects.create(course=self.geometry, title='Shapes', description='Shapes', order=1)
+        self.lessons = [
+            Lesson.objects.create(module=self.module, title=f'Lesson {n}', content='...', order=n) for n in (1, 2, 3, 4)
+        ]
+        self.progress = CourseProgress.objects.create(student=self.student, course=self.algebra)
+
+    def import_rows(self, resource, headers, *rows):
+        result = resource.import_data(Dataset(*rows, headers=headers), raise_errors=True)
+        self.assertFalse(result.has_errors())
+        return result
+
+    def lesson_row(self, lesson, module=None, *extra):
+        return [lesson.pk, (module or lesson.module).pk, lesson.title, lesson.content, '', 10, lesson.order, *extra]
+
+    def set_completed(self, *lessons):
+        return self.import_rows(
+            CourseProgressResource(), ['id', 'student', 'course', 'completed_lessons'],
+            [self.progress.pk, self.student.pk, self.algebra.pk, ','.join(str(lesson.pk) for lesson in lessons)],
+        )
+
+    def assertCounters(self, algebra_lessons, completed, percentage):
+        self.algebra.refresh_from_db()
+        self.progress.refresh_from_db()
+        self.assertEqual(self.algebra.total_lessons, algebra_lessons)
+        self.assertEqual((self.progress.completed_lessons_count, self.progress.progress_percentage),
+                         (completed, percentage))
+
+    def test_course_progress_import_recounts_completed_lessons(self):
+        self.set_completed(*self.lessons[:2])
+        self.assertCounters(4, 2, 50)
+
+        self.set_completed(self.lessons[3])
+        self.assertCounters(4, 1, 25)
+
+    def test_lesson_import_recounts_courses_and_progress(self):
+        self.set_completed(*self.lessons[:2])
+
+        self.import_rows(
+            LessonResource(), LESSON_HEADERS,
+            ['', self.module.pk, 'Lesson 5', '...', '', 10, 5],
+            ['', self.module.pk, 'Lesson 6', '...', '', 10, 6],
+            self.lesson_row(self.lessons[0]),
+        )
+        self.assertCounters(6, 2, 33)
+
+        # Moving a lesson out of the course takes it off both counters' totals
+        self.import_rows(LessonResource(), LESSON_HEADERS, self.lesson_row(self.lessons[3], self.other_module))
+        self.assertCounters(5, 2, 40)
+        self.geometry.refresh_from_db()
+        self.assertEqual(self.geometry.total_lessons, 1)
+
+    def test_lesson_import_deletes_recount_courses_and_progress(self):
+        self.set_completed(*self.lessons[:2])
+
+        self.import_rows(
+            DeletingLessonResource(), LESSON_HEADERS + ['delete'],
+            self.lesson_row(self.lessons[0], None, '1'), self.lesson_row(self.lessons[3], None, '1'),
+        )
+        self.assertCounters(2, 1, 50)
+
+    def test_module_import_recounts_both_courses(self):
+        self.import_rows(
+            ModuleResource(), ['id', 'course', 'title', 'description', 'order'],
+            [self.module.pk, self.geometry.pk, 'Basics', 'Basics', 1],
+            ['', self.algebra.pk, 'Advanced', 'Advanced', 2],
+        )
+
+        self.algebra.refresh_from_db()
+        self.geometry.refresh_from_db()
+        self.assertEqual((self.algebra.total_lessons, self.geometry.total_lessons), (0, 4))
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        instructor = User.objects.create_user(username='teacher', password='x', user_type='teacher')
+        subject, _ = Subject.objects.get_or_create(name='Mathematics')
+        for title, description in (
+            ('Linear algebra', 'Vectors, matrices and linear maps'),
+            ('Calculus', 'Limits and derivatives, with a refresher on algebra'),
+            ('Algebraic geometry', 'Varieties and schemes'),
+            ('Organic chemistry', 'Carbon compounds'),
+        ):
+            Course.objects.create(title=title, description=description, instructor=instructor, category=subject)
+
+    def search(self, query):
+        return list(search_courses(Course.objects.all(), query).values_list('title', flat=True))
+
+    def test_ranks_title_matches_first(self):
+        self.assertTrue(search_index_available(connection))
+
+        results = self.search('algebra')
+        # Stemmed, so 'Algebraic' matches too; title matches outrank description ones
+        self.assertEqual(sorted(results[:2]), ['Algebraic geometry', 'Linear algebra'])
+        self.assertEqual(results[2:], ['Calculus'])
+        ranks = list(search_courses(Course.objects.all(), 'algebra').values_list('search_rank', flat=True))
+        self.assertGreater(ranks[1], ranks[2])
+
+        # The last term is a prefix, and every term must match, in any order
+        self.assertEqual(self.search('geom'), ['Algebraic geometry'])
+        self.assertEqual(self.search('algebra lin'), ['Linear algebra'])
+        self.assertEqual(self.search('physics'), [])
+
+    def test_course_list_search(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='student', password='x', user_type='student'))
+
+        response = client.get('/api/syllabus/', {'search': 'algebra lin'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([course['title'] for course in response.data['results']], ['Linear algebra'])
+
+    def test_index_follows_course_edits(self):
+        Course.objects.filter(title='Organic chemistry').update(description='Carbon compounds and algebra')
+        Course.objects.filter(title='Calculus').delete()
+
+        self.assertEqual(sorted(self.search('algebra')), ['Algebraic geometry', 'Linear algebra', 'Organic chemistry'])
+
+    def test_falls_back_to_icontains_without_the_index(self):
+        uninstall_search_index(connection)
+        self.addCleanup(install_search_index, connection)
+
+        self.assertFalse(search_index_available(connection))
+        self.assertEqual(sorted(self.search('algebra')), ['Algebraic geometry', 'Calculus', 'Linear algebra'])
+        self.assertEqual(self.search('linear alg'), ['Linear algebra'])
+        self.assertEqual(self.search('algebra lin'), [])
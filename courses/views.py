@@ -1,20 +1,27 @@
+import itertools
+
 from django.shortcuts import render, get_object_or_404
-from rest_framework import generics, permissions, status, viewsets
+from rest_framework import generics, pagination, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.utils import timezone
 
 from courses.subjects.models import Subject
+from elearning.pagination import StaffPageSizeMixin, is_trusted_client
+from elearning.streaming import iter_csv, streaming_download
 from courses.subjects.serializers import SubjectSerializer
+from .analytics import TREND_PERIODS, course_summary, enrollment_trend, recent_enrollments
+from .search import search_courses
 from .models import Course, Module, Lesson, CourseEnrollment, Assignment, AssignmentQuestion, AssignmentChoice, AssignmentSubmission, AssignmentAnswer
 from .serializers import (
-    CourseSerializer, CourseCreateSerializer,
+    CourseSerializer, CourseListSerializer, CourseCreateSerializer,
     ModuleSerializer, ModuleCreateSerializer,
     LessonSerializer, LessonCreateSerializer,
     AssignmentSerializer, AssignmentCreateSerializer,
     AssignmentQuestionSerializer, AssignmentQuestionCreateSerializer,
-    AssignmentSubmissionSerializer, StaffAssignmentSerializer, StaffAssignmentCreateSerializer
+    AssignmentSubmissionSerializer, StaffAssignmentSerializer, StaffAssignmentCreateSerializer,
+    CourseRosterSerializer, StaffCourseRosterSerializer
 )
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -24,8 +31,41 @@ from rest_framework.generics import GenericAPIView
 
 # Create your views here.
 
+class CourseExpandMixin:
+    """
+    Parses `?expand=modules,students` for course detail views and only
+    prefetches and renders the nested trees that were asked for.
+    """
+
+    def get_expand(self):
+        expand = self.request.query_params.get('expand', '')
+        return {field.strip() for field in expand.split(',') if field.strip()}
+
+    def get_course_queryset(self):
+        expand = self.get_expand()
+        queryset = Course.objects.with_stats()
+        if 'modules' in expand:
+            queryset = queryset.with_modules()
+        if 'students' in expand:
+            queryset = queryset.with_students()
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+
+expand_parameter = openapi.Parameter(
+    'expand',
+    openapi.IN_QUERY,
+    description="Comma-separated nested fields to include: modules, students",
+    type=openapi.TYPE_STRING,
+    required=False
+)
+
 class CourseListView(generics.ListCreateAPIView):
-    serializer_class = CourseSerializer
+    serializer_class = CourseListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     @swagger_auto_schema(
@@ -34,7 +74,7 @@ class CourseListView(generics.ListCreateAPIView):
             openapi.Parameter(
                 'search',
                 openapi.IN_QUERY,
-                description="Search courses by title or description",
+                description="Full-text search over course title and description (last word matches as a prefix)",
                 type=openapi.TYPE_STRING,
                 required=False
             ),
@@ -47,7 +87,7 @@ class CourseListView(generics.ListCreateAPIView):
             ),
         ],
         responses={
-            200: CourseSerializer(many=True),
+            200: CourseListSerializer(many=True),
             401: "Unauthorized",
             403: "Forbidden"
         }
@@ -55,18 +95,22 @@ class CourseListView(generics.ListCreateAPIView):
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
+    def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return CourseSerializer
+        return CourseListSerializer
+
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Course.objects.none()
             
         user = self.request.user
-        queryset = Course.objects.all()
+        queryset = Course.objects.with_stats()
 
         # Add search functionality
         search_query = self.request.query_params.get('search', None)
         if search_query:
-            queryset = queryset.filter(title__icontains=search_query) | \
-                      queryset.filter(description__icontains=search_query)
+            queryset = search_courses(queryset, search_query)
 
         # Add category filter
         category = self.request.query_params.get('category', None)
@@ -79,11 +123,19 @@ class CourseListView(generics.ListCreateAPIView):
             return queryset
         return queryset.none()
 
-class CourseDetailView(generics.RetrieveAPIView):
-    queryset = Course.objects.all()
+class CourseDetailView(CourseExpandMixin, generics.RetrieveAPIView):
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=[expand_parameter])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return Course.objects.none()
+        return self.get_course_queryset()
+
 class CourseCreateView(generics.CreateAPIView):
     queryset = Course.objects.all()
     serializer_class = CourseCreateSerializer
@@ -214,13 +266,13 @@ class LessonDetailView(generics.RetrieveUpdateDestroyAPIView):
         return LessonSerializer
 
 class StaffCourseListView(generics.ListAPIView):
-    serializer_class = CourseSerializer
+    serializer_class = CourseListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         if self.request.user.user_type != 'teacher':
             raise PermissionDenied("Only teachers can access this endpoint")
-        return Course.objects.filter(instructor=self.request.user)
+        return Course.objects.with_stats().filter(instructor=self.request.user)
 
     def list(self, request, *args, **kwargs):
         try:
@@ -232,12 +284,16 @@ class StaffCourseListView(generics.ListAPIView):
         except Exception as e:
             return Response({"detail": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class StaffCourseDetailView(generics.RetrieveAPIView):
+class StaffCourseDetailView(CourseExpandMixin, generics.RetrieveAPIView):
     serializer_class = CourseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=[expand_parameter])
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_object(self):
-        course = get_object_or_404(Course, pk=self.kwargs['pk'])
+        course = get_object_or_404(self.get_course_queryset(), pk=self.kwargs['pk'])
         if self.request.user.user_type != 'teacher' or course.instructor != self.request.user:
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
         return course
@@ -271,28 +327,73 @@ class StaffCourseDeleteView(generics.DestroyAPIView):
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
         return course
 
-class StaffCourseStudentsView(APIView):
+class RosterPagination(StaffPageSizeMixin, pagination.PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+ROSTER_ORDERINGS = ('enrollment_date', '-enrollment_date')
+
+ROSTER_CSV_COLUMNS = ['student_id', 'username', 'email', 'first_name', 'last_name', 'enrollment_date']
+
+roster_parameters = [
+    openapi.Parameter('ordering', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(ROSTER_ORDERINGS)),
+    openapi.Parameter('output', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=['csv'],
+                      description="Stream the whole roster as CSV (teachers and staff)"),
+]
+
+
+class CourseRosterMixin:
+    """
+    Course rosters served from one CourseEnrollment query with the students
+    joined in: paginated JSON, or the whole roster streamed as `?output=csv`.
+    """
+    roster_serializer_class = CourseRosterSerializer
+
+    def get_roster_queryset(self, course):
+        ordering = self.request.query_params.get('ordering', 'enrollment_date')
+        if ordering not in ROSTER_ORDERINGS:
+            raise ValidationError({'ordering': f"Choose one of: {', '.join(ROSTER_ORDERINGS)}"})
+        tiebreak = '-id' if ordering.startswith('-') else 'id'
+        return CourseEnrollment.objects.filter(course=course).select_related('student').order_by(ordering, tiebreak)
+
+    def roster_response(self, course, build):
+        enrollments = self.get_roster_queryset(course)
+        output = self.request.query_params.get('output')
+        if output:
+            if output != 'csv':
+                raise ValidationError({'output': "Choose one of: csv"})
+            if not is_trusted_client(self.request.user):
+                raise PermissionDenied("Only teachers and staff can export rosters.")
+            rows = enrollments.values_list(
+                'student_id', 'student__username', 'student__email',
+                'student__first_name', 'student__last_name', 'enrollment_date'
+            ).iterator(chunk_size=2000)
+            return streaming_download(
+                iter_csv(itertools.chain([ROSTER_CSV_COLUMNS], rows)), 'csv', f'course_{course.pk}_students'
+            )
+
+        paginator = RosterPagination()
+        page = paginator.paginate_queryset(enrollments, self.request, view=self)
+        data = self.roster_serializer_class(page, many=True).data
+        return Response(build(data, paginator))
+
+
+class StaffCourseStudentsView(CourseRosterMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    roster_serializer_class = StaffCourseRosterSerializer
 
+    @swagger_auto_schema(manual_parameters=roster_parameters)
     def get(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        if request.user.user_type != 'teacher' or course.instructor != request.user:
+        if request.user.user_type != 'teacher' or course.instructor_id != request.user.pk:
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        
-        students = course.students.all()
-        return Response({
-            'total_students': students.count(),
-            'students': [
-                {
-                    'id': student.id,
-                    'username': student.username,
-                    'email': student.email,
-                    'first_name': student.first_name,
-                    'last_name': student.last_name,
-                    'enrolled_at': CourseEnrollment.objects.get(student=student, course=course).enrollment_date
-                }
-                for student in students
-            ]
+        return self.roster_response(course, lambda page, paginator: {
+            'total_students': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'students': page,
         })
 
 class StaffCourseAnalyticsView(APIView):
@@ -300,49 +401,34 @@ class StaffCourseAnalyticsView(APIView):
 
     def get(self, request, pk):
         course = get_object_or_404(Course, pk=pk)
-        if request.user.user_type != 'teacher' or course.instructor != request.user:
+        if request.user.user_type != 'teacher' or course.instructor_id != request.user.pk:
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
 
-        total_students = course.students.count()
-        total_revenue = course.price * total_students
-        average_rating = course.reviews.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
-
         return Response({
-            'total_students': total_students,
-            'total_revenue': total_revenue,
-            'average_rating': average_rating,
+            **course_summary(course),
             'enrollment_trend': {
-                'last_30_days': CourseEnrollment.objects.filter(
-                    course=course,
-                    enrollment_date__gte=timezone.now() - timezone.timedelta(days=30)
-                ).count()
+                'last_30_days': recent_enrollments(course, days=30)
             }
         })
 
-class CourseStudentsView(APIView):
+class CourseStudentsView(CourseRosterMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=roster_parameters)
     def get(self, request, pk):
         try:
             course = Course.objects.get(pk=pk)
-            if request.user.user_type == 'teacher' and course.instructor != request.user:
-                return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-            
-            students = course.students.all()
-            return Response({
-                'course': course.title,
-                'students': [
-                    {
-                        'id': student.id,
-                        'username': student.username,
-                        'email': student.email,
-                        'enrollment_date': CourseEnrollment.objects.get(student=student, course=course).enrollment_date
-                    }
-                    for student in students
-                ]
-            })
         except Course.DoesNotExist:
             return Response({'error': 'Course not found'}, status=404)
+        if request.user.user_type == 'teacher' and course.instructor_id != request.user.pk:
+            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+        return self.roster_response(course, lambda page, paginator: {
+            'course': course.title,
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'students': page,
+        })
 
 
 class StaffSubjectViewSet(generics.ListAPIView):
@@ -357,40 +443,44 @@ class StaffSubjectViewSet(generics.ListAPIView):
 class CourseAnalyticsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=[
+        openapi.Parameter('period', openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=list(TREND_PERIODS),
+                          description="Trend buckets (default month)"),
+        openapi.Parameter('months', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description="How far back the trend goes (default 6)"),
+    ])
     def get(self, request, pk):
         try:
             course = Course.objects.get(pk=pk)
-            if request.user.user_type == 'teacher' and course.instructor != request.user:
-                return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-            
-            total_students = course.students.count()
-            total_revenue = total_students * course.price
-            average_rating = course.ratings.aggregate(Avg('rating'))['rating__avg'] or 0
-            
-            # Get enrollment trends (last 6 months)
-            six_months_ago = timezone.now() - timezone.timedelta(days=180)
-            enrollments = CourseEnrollment.objects.filter(
-                course=course,
-                enrollment_date__gte=six_months_ago
-            ).values('enrollment_date__month').annotate(
-                count=Count('id')
-            ).order_by('enrollment_date__month')
-            
-            return Response({
-                'course': course.title,
-                'total_students': total_students,
-                'total_revenue': total_revenue,
-                'average_rating': average_rating,
-                'enrollment_trends': [
-                    {
-                        'month': enrollment['enrollment_date__month'],
-                        'count': enrollment['count']
-                    }
-                    for enrollment in enrollments
-                ]
-            })
         except Course.DoesNotExist:
             return Response({'error': 'Course not found'}, status=404)
+        if request.user.user_type == 'teacher' and course.instructor_id != request.user.pk:
+            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
+
+        period = request.query_params.get('period', 'month')
+        if period not in TREND_PERIODS:
+            raise ValidationError({'period': f"Choose one of: {', '.join(TREND_PERIODS)}"})
+        months = request.query_params.get('months', '6')
+        if not months.isdigit() or not 0 < int(months) <= 240:
+            raise ValidationError({'months': "Must be a whole number of months from 1 to 240."})
+
+        # Enrollment trends (whole calendar months, the current one included)
+        today = timezone.localdate()
+        first_month = today.year * 12 + today.month - int(months)
+        since = today.replace(year=first_month // 12, month=first_month % 12 + 1, day=1)
+        trend = enrollment_trend(course, period, since)
+
+        return Response({
+            'course': course.title,
+            **course_summary(course),
+            'enrollment_trends': [
+                {
+                    period: bucket['period'].strftime('%Y-%m' if period == 'month' else '%Y-%m-%d'),
+                    'count': bucket['count']
+                }
+                for bucket in trend
+            ]
+        })
 
 # Assignment Views
 class AssignmentListView(generics.ListCreateAPIView):
@@ -0,0 +1,155 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def is_trusted_client(user):
+    return user.is_authenticated and (user.is_staff or getattr(user, 'user_type', None) == 'teacher')
+
+
+class StaffPageSizeMixin:
+    """
+    Lets teachers and staff ask for pages up to settings.STAFF_MAX_PAGE_SIZE
+    instead of the paginator's public max_page_size.
+    """
+
+    def get_page_size(self, request):
+        if is_trusted_client(request.user):
+            self.max_page_size = max(self.max_page_size or 0, settings.STAFF_MAX_PAGE_SIZE)
+        return super().get_page_size(request)
+
+
+class KeysetPagination(pagination.BasePagination):
+    """
+    Forward-only keyset ("seek") pagination over a fixed ordering.
+
+    The cursor holds the ordering values of the last row of the previous page
+    and the next page is fetched with a lexicographic WHERE on those values,
+    so there is no COUNT(*) and no OFFSET scan: page 1000 costs the same as
+    page 1. The last field of ``ordering`` must be unique (normally the pk).
+    """
+    ordering = ('-id',)
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 12
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size) if self.max_page_size else size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is None:
+            rows = list(queryset[:self.page_size + 1])
+        else:
+            # A well-formed cursor can still hold values the ordering fields
+            # reject (wrong types, nulls); those fail building or running the query
+            try:
+                rows = list(queryset.filter(self.seek_filter(position))[:self.page_size + 1])
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = self.get_position(rows[-1]) if self.has_next else None
+        return rows
+
+    def seek_filter(self, position):
+        # (a, b, c) > (x, y, z) expanded as
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        # with > flipped to < for descending fields.
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': position[index]})
+            for previous, value in zip(self.ordering[:index], position[:index]):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def get_position(self, obj):
+        position = []
+        for field in self.ordering:
+            value = obj
+            for part in field.lstrip('-').split('__'):
+                value = getattr(value, part)
+            position.append(value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'page_size': self.page_size,
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    View mixin that switches from the view's regular pagination_class to
+    keyset_pagination_class when the request carries a `cursor` parameter
+    (an empty `?cursor=` starts from the first page).
+    """
+    keyset_pagination_class = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            cursor_param = getattr(self.keyset_pagination_class, 'cursor_query_param', None)
+            if cursor_param and cursor_param in self.request.query_params:
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super().paginator
+        return self._paginator
@@ -126,6 +126,45 @@ elif 'POSTGRES_URL' in os.environ:
     }
 
 
+# Cache
+# Per-process memory by default; set REDIS_URL to share the cache across workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+
+# Exam answer keys are versioned by Exam.updated_at, so this only bounds
+# how long unused keys linger (see exams.answer_keys)
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Exam papers served to candidates are versioned the same way (see exams.papers)
+EXAM_PAPER_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Course outlines are versioned by Course.updated_at, so this too only
+# bounds how long unused ones linger (see courses.outline)
+COURSE_OUTLINE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Staff dashboard totals are dropped by signals on change, but with a
+# per-process cache other workers only see that after this many seconds
+STAFF_DASHBOARD_CACHE_TIMEOUT = int(os.environ.get('STAFF_DASHBOARD_CACHE_TIMEOUT', 60))
+
+# Past-question scraper (see exams.scraper): the site scrape jobs read,
+# concurrent requests, requests per second per host, and an optional
+# directory for cached raw pages
+SCRAPER_BASE_URL = os.environ.get('SCRAPER_BASE_URL', 'https://nigerianscholars.com')
+SCRAPER_MAX_WORKERS = int(os.environ.get('SCRAPER_MAX_WORKERS', 8))
+SCRAPER_RATE_LIMIT = float(os.environ.get('SCRAPER_RATE_LIMIT', 4))
+SCRAPER_CACHE_DIR = os.environ.get('SCRAPER_CACHE_DIR') or None
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -198,6 +237,9 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10
 }
 
+# Largest page size teachers/staff clients may request (see elearning.pagination)
+STAFF_MAX_PAGE_SIZE = int(os.environ.get('STAFF_MAX_PAGE_SIZE', 100))
+
 # JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
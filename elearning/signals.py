@@ -0,0 +1,11 @@
+"""Helpers shared by the apps' signal receivers."""
+from django.db.models import QuerySet
+
+
+def deleted_via(origin, *models):
+    """
+    Whether a post_delete/pre_delete ``origin`` (the instance or queryset
+    whose delete() cascaded to the receiver's instance) is one of ``models``.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model in models
@@ -0,0 +1,40 @@
+"""
+Helpers for streaming large CSV/JSON Lines downloads.
+
+Rows are rendered one at a time as the response is consumed, so memory stays
+flat however many rows a queryset iterator yields.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class Echo:
+    """File-like object whose write() hands the written line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def streaming_download(chunks, output, filename):
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -1,19 +1,49 @@
 from django.contrib import admin
-from import_export import resources
+from elearning.resources import BulkModelResource
+from import_export import fields, widgets
 from import_export.admin import ImportExportModelAdmin
-from .models import Exam, Question, Choice, ExamAttempt, Answer
+from .analytics import rebuild_exam_analytics
+from .answer_keys import touch_exam
+from .leaderboard import rebuild_type_analytics
+from .models import Exam, Question, Choice, ExamAttempt, Answer, ScrapeJob
+from .utils import question_text_hash
 
 class ChoiceInline(admin.TabularInline):
     model = Choice
     extra = 4
 
-class QuestionResource(resources.ModelResource):
+class QuestionResource(BulkModelResource):
     class Meta:
         model = Question
         fields = ('id', 'exam', 'question_text', 'question_type', 'marks', 'order')
         export_order = fields
 
-class ExamResource(resources.ModelResource):
+    # Bulk writes bypass Question.save() and the signals that version answer keys
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.imported_exam_ids = set()
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        instance.text_hash = question_text_hash(instance.question_text)
+        self.imported_exam_ids.add(instance.exam_id)
+
+    def get_bulk_update_fields(self):
+        return [*super().get_bulk_update_fields(), 'text_hash']
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get('dry_run'):
+            for exam_id in self.imported_exam_ids:
+                touch_exam(exam_id)
+
+class ExamResource(BulkModelResource):
+    # Exported only: updated_at versions the cached answer keys and papers,
+    # so an older export must not roll it back
+    updated_at = fields.Field(attribute='updated_at', column_name='updated_at',
+                              widget=widgets.DateTimeWidget(), readonly=True)
+
     class Meta:
         model = Exam
         fields = ('id', 'subject', 'title', 'description', 'duration', 'total_marks',
@@ -21,19 +51,100 @@ class ExamResource(resources.ModelResource):
                  'created_at', 'updated_at')
         export_order = fields
 
-class ExamAttemptResource(resources.ModelResource):
+    # Bulk writes bypass Exam.save() and the signals that version answer
+    # keys and keep the examination type histograms current
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.imported_exam_ids = set()
+        self.previous_grading = {}
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        if not new:
+            self.previous_grading[instance.pk] = (instance.examination_type_id, instance.total_marks)
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        if instance.pk is not None:
+            self.imported_exam_ids.add(instance.pk)
+
+    def get_bulk_update_fields(self):
+        return [name for name in super().get_bulk_update_fields() if name != 'updated_at']
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for exam_id in self.imported_exam_ids:
+            touch_exam(exam_id)
+        regraded_type_ids = set()
+        for exam_id, examination_type_id, total_marks in Exam.objects.filter(
+            pk__in=self.previous_grading
+        ).values_list('pk', 'examination_type_id', 'total_marks'):
+            previous = self.previous_grading[exam_id]
+            if previous != (examination_type_id, total_marks):
+                regraded_type_ids.update((previous[0], examination_type_id))
+        for examination_type_id in regraded_type_ids - {None}:
+            rebuild_type_analytics(examination_type_id)
+
+class GradedWorkResource(BulkModelResource):
+    # Bulk writes bypass the grading transaction that folds attempts into
+    # ExamAnalytics and the examination type histograms, so the exams an
+    # import touched are rebuilt afterwards, along with their types.
+    # `parent_field` is the foreign key the rows hang off; an exam id unless
+    # get_touched_exam_ids says otherwise.
+    parent_field = 'exam_id'
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.touched_parent_ids = set()
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        # Where an existing row hangs before the import moves it
+        if not new:
+            self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def before_delete_instance(self, instance, row, **kwargs):
+        super().before_delete_instance(instance, row, **kwargs)
+        self.touched_parent_ids.add(getattr(instance, self.parent_field))
+
+    def get_touched_exam_ids(self):
+        return self.touched_parent_ids - {None}
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        exams = Exam.objects.filter(pk__in=self.get_touched_exam_ids()).order_by('pk')
+        for exam in exams:
+            rebuild_exam_analytics(exam)
+        for examination_type_id in {exam.examination_type_id for exam in exams} - {None}:
+            rebuild_type_analytics(examination_type_id)
+
+class ExamAttemptResource(GradedWorkResource):
     class Meta:
         model = ExamAttempt
         fields = ('id', 'exam', 'student', 'start_time', 'end_time', 'score',
                  'is_completed')
         export_order = fields
 
-class AnswerResource(resources.ModelResource):
+class AnswerResource(GradedWorkResource):
+    parent_field = 'attempt_id'
+
     class Meta:
         model = Answer
         fields = ('id', 'attempt', 'question', 'answer_text', 'marks_obtained')
         export_order = fields
 
+    def get_touched_exam_ids(self):
+        return set(ExamAttempt.objects.filter(pk__in=self.touched_parent_ids).values_list('exam_id', flat=True))
+
 @admin.register(Exam)
 class ExamAdmin(ImportExportModelAdmin):
     resource_class = ExamResource
@@ -69,3 +180,11 @@ class AnswerAdmin(ImportExportModelAdmin):
     list_filter = ('attempt__exam',)
     search_fields = ('answer_text', 'attempt__student__username')
     raw_id_fields = ('attempt', 'question')
+
+@admin.register(ScrapeJob)
+class ScrapeJobAdmin(admin.ModelAdmin):
+    list_display = ('subject_name', 'year', 'status', 'pages_fetched', 'pages', 'worker', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('subject_name', 'slug')
+    ordering = ('-created_at',)
+    raw_id_fields = ('exam',)
@@ -0,0 +1,195 @@
+"""
+Exam analytics rollups.
+
+ExamAnalytics keeps sums over an exam's graded attempts: the attempt count,
+passes, the sum and sum of squares of scores, how many attempts got each
+score, and per question the correct count, the summed scores of the attempts
+that got it right and how often each choice was picked. Every figure in the
+report is derived from those sums, so a newly graded attempt is folded in
+with one locked read-modify-write (``record_graded_attempt``) instead of
+re-reading every Answer. Folding happens inside the grading transaction, so
+an attempt is counted exactly when it commits. ``rebuild_exam_analytics``
+recomputes the sums in one streamed pass over the exam's answers (``manage.py
+rebuild_exam_analytics``); exams.signals runs it when an exam's passing
+marks change.
+
+Item statistics follow classical test theory: a question's p-value is the
+share of attempts that got it right, and its discrimination index is the
+point-biserial correlation between getting it right and the total score.
+"""
+import itertools
+import math
+
+from django.db import transaction
+
+from .answer_keys import get_answer_key
+from .models import Answer, Choice, Exam, ExamAnalytics, ExamAttempt, Question
+
+HISTOGRAM_BINS = 10
+
+
+class ExamTotals:
+    """The mergeable sums behind ExamAnalytics."""
+
+    def __init__(self, attempts=0, passed=0, score_sum=0, score_square_sum=0,
+                 score_counts=None, question_stats=None):
+        self.attempts = attempts
+        self.passed = passed
+        self.score_sum = score_sum
+        self.score_square_sum = score_square_sum
+        # JSON object keys, hence str ids and scores
+        self.score_counts = score_counts if score_counts is not None else {}
+        self.question_stats = question_stats if question_stats is not None else {}
+
+    @classmethod
+    def from_model(cls, analytics):
+        return cls(analytics.attempts, analytics.passed, analytics.score_sum, analytics.score_square_sum,
+                   analytics.score_counts, analytics.question_stats)
+
+    def add_attempt(self, score, passing_marks, answers):
+        """Fold in one graded attempt; ``answers`` are (question, choice, marks) id tuples."""
+        self.attempts += 1
+        self.passed += score >= passing_marks
+        self.score_sum += score
+        self.score_square_sum += score * score
+        key = str(score)
+        self.score_counts[key] = self.score_counts.get(key, 0) + 1
+        for question_id, choice_id, marks in answers:
+            stats = self.question_stats.setdefault(
+                str(question_id), {'correct': 0, 'correct_score_sum': 0, 'choices': {}}
+            )
+            if marks:
+                stats['correct'] += 1
+                stats['correct_score_sum'] += score
+            if choice_id is not None:
+                choices = stats['choices']
+                choices[str(choice_id)] = choices.get(str(choice_id), 0) + 1
+
+    def save_to(self, analytics):
+        analytics.attempts = self.attempts
+        analytics.passed = self.passed
+        analytics.score_sum = self.score_sum
+        analytics.score_square_sum = self.score_square_sum
+        analytics.score_counts = self.score_counts
+        analytics.question_stats = self.question_stats
+        analytics.save()
+
+
+def locked_analytics(exam_id):
+    """``exam_id``'s ExamAnalytics row, created if missing and locked until the transaction ends."""
+    return ExamAnalytics.objects.select_for_update().get_or_create(exam_id=exam_id)[0]
+
+
+def rebuild_exam_analytics(exam):
+    """Recompute ``exam``'s ExamAnalytics from its graded attempts."""
+    with transaction.atomic():
+        # Attempts are folded in by the transaction that grades them, so every
+        # committed one is already counted; locking before reading makes any
+        # being graded meanwhile wait and land on top of the rebuilt sums.
+        analytics = locked_analytics(exam.pk)
+        scores = dict(ExamAttempt.objects.filter(
+            exam=exam, is_completed=True, score__isnull=False
+        ).values_list('id', 'score'))
+        answers = Answer.objects.filter(
+            attempt__exam=exam, attempt__is_completed=True, attempt__score__isnull=False
+        ).order_by('attempt_id').values_list(
+            'attempt_id', 'question_id', 'selected_choice_id', 'marks_obtained'
+        ).iterator(chunk_size=5000)
+
+        totals = ExamTotals()
+        for attempt_id, rows in itertools.groupby(answers, key=lambda row: row[0]):
+            totals.add_attempt(scores.pop(attempt_id), exam.passing_marks, (row[1:] for row in rows))
+        # Attempts submitted without any answers
+        for score in scores.values():
+            totals.add_attempt(score, exam.passing_marks, ())
+        totals.save_to(analytics)
+    return analytics
+
+
+def record_graded_attempt(attempt):
+    """
+    Fold ``attempt`` into its exam's analytics, from inside the transaction
+    grading it. Rows exist from the exam's creation on (see exams.signals),
+    so this only ever adds.
+    """
+    answers = list(Answer.objects.filter(attempt_id=attempt.pk).values_list(
+        'question_id', 'selected_choice_id', 'marks_obtained'
+    ))
+    with transaction.atomic():
+        analytics = locked_analytics(attempt.exam_id)
+        # Read under the lock: a passing marks change rebuilds the row with
+        # the new value, and this must not fold in with the old one after it
+        passing_marks = Exam.objects.filter(pk=attempt.exam_id).values_list('passing_marks', flat=True).get()
+        totals = ExamTotals.from_model(analytics)
+        totals.add_attempt(attempt.score, passing_marks, answers)
+        totals.save_to(analytics)
+
+
+def get_exam_analytics(exam):
+    return ExamAnalytics.objects.filter(pk=exam.pk).first() or rebuild_exam_analytics(exam)
+
+
+def score_histogram(score_counts, max_score):
+    width = max_score / HISTOGRAM_BINS if max_score else 0
+    counts = [0] * HISTOGRAM_BINS
+    for score, count in score_counts.items():
+        index = min(int(int(score) / width), HISTOGRAM_BINS - 1) if width else 0
+        counts[index] += count
+    return [
+        {'from': round(index * width, 2), 'to': round((index + 1) * width, 2), 'count': count}
+        for index, count in enumerate(counts)
+    ]
+
+
+def discrimination_index(correct, correct_score_sum, attempts, score_sum, std_dev):
+    # Point-biserial: (mean score when right - mean when wrong) / sd * sqrt(pq)
+    if not 0 < correct < attempts or not std_dev:
+        return None
+    p = correct / attempts
+    mean_right = correct_score_sum / correct
+    mean_wrong = (score_sum - correct_score_sum) / (attempts - correct)
+    return (mean_right - mean_wrong) / std_dev * math.sqrt(p * (1 - p))
+
+
+def exam_analytics_report(exam, analytics):
+    answer_key = get_answer_key(exam)
+    attempts = analytics.attempts
+    mean = analytics.score_sum / attempts if attempts else 0
+    variance = analytics.score_square_sum / attempts - mean * mean if attempts else 0
+    std_dev = math.sqrt(max(variance, 0))
+    max_score = answer_key.total_marks or exam.total_marks
+
+    question_texts = dict(Question.objects.filter(exam=exam).values_list('id', 'question_text'))
+    choice_texts = dict(Choice.objects.filter(question__exam=exam).values_list('id', 'choice_text'))
+    questions = []
+    for index, question_id in enumerate(answer_key.question_ids):
+        stats = analytics.question_stats.get(str(question_id), {})
+        correct = stats.get('correct', 0)
+        selections = stats.get('choices', {})
+        discrimination = discrimination_index(
+            correct, stats.get('correct_score_sum', 0), attempts, analytics.score_sum, std_dev
+        )
+        questions.append({
+            'question_id': question_id,
+            'question_text': question_texts.get(question_id, ''),
+            'p_value': round(correct / attempts, 4) if attempts else None,
+            'discrimination': round(discrimination, 4) if discrimination is not None else None,
+            'choices': [
+                {
+                    'choice_id': choice_id,
+                    'choice_text': choice_texts.get(choice_id, ''),
+                    'is_correct': choice_id in answer_key.correct_choice_ids[index],
+                    'selection_rate': round(selections.get(str(choice_id), 0) / attempts, 4) if attempts else 0,
+                }
+                for choice_id in sorted(answer_key.choice_ids[index])
+            ],
+        })
+
+    return {
+        'completed_attempts': attempts,
+        'average_score': round(mean, 2),
+        'score_std_dev': round(std_dev, 2),
+        'passing_rate': round(analytics.passed / attempts * 100, 2) if attempts else 0,
+        'score_distribution': score_histogram(analytics.score_counts, max_score),
+        'questions': questions,
+    }
@@ -0,0 +1,97 @@
+"""
+Cached answer keys.
+
+An AnswerKey is the compact form of "which choices are correct for exam X":
+parallel tuples indexed by question position. Keys live in Django's cache
+under the exam's ``updated_at``, so a stale key is never read. Question and
+Choice signals (see exams.signals) bump ``updated_at`` whenever the key could
+change, and code that bypasses signals (bulk writes) calls ``touch_exam``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Exam, Question
+from .utils import normalize_text
+
+
+class AnswerKey:
+    __slots__ = ('exam_id', 'question_ids', 'marks', 'question_types',
+                 'choice_ids', 'correct_choice_ids', 'choice_texts', 'positions')
+
+    def __init__(self, exam_id, question_ids, marks, question_types,
+                 choice_ids, correct_choice_ids, choice_texts):
+        self.exam_id = exam_id
+        self.question_ids = question_ids
+        self.marks = marks
+        self.question_types = question_types
+        self.choice_ids = choice_ids
+        self.correct_choice_ids = correct_choice_ids
+        # Normalized choice text -> choice id, per question
+        self.choice_texts = choice_texts
+        self.positions = {question_id: index for index, question_id in enumerate(question_ids)}
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def __contains__(self, question_id):
+        return question_id in self.positions
+
+    @property
+    def total_marks(self):
+        return sum(self.marks)
+
+    @classmethod
+    def build(cls, exam_id):
+        rows = Question.objects.filter(exam_id=exam_id).order_by('order', 'id').values_list(
+            'id', 'marks', 'question_type',
+            'choices__id', 'choices__choice_text', 'choices__is_correct'
+        )
+        questions = {}
+        for question_id, marks, question_type, choice_id, choice_text, is_correct in rows:
+            entry = questions.setdefault(question_id, (marks, question_type, [], [], {}))
+            if choice_id is None:
+                continue
+            entry[2].append(choice_id)
+            if is_correct:
+                entry[3].append(choice_id)
+            entry[4].setdefault(normalize_text(choice_text), choice_id)
+        entries = list(questions.values())
+        return cls(
+            exam_id=exam_id,
+            question_ids=tuple(questions),
+            marks=tuple(entry[0] for entry in entries),
+            question_types=tuple(entry[1] for entry in entries),
+            choice_ids=tuple(frozenset(entry[2]) for entry in entries),
+            correct_choice_ids=tuple(frozenset(entry[3]) for entry in entries),
+            choice_texts=tuple(entry[4] for entry in entries),
+        )
+
+
+def exam_version(exam):
+    return int(exam.updated_at.timestamp() * 1000000)
+
+
+def answer_key_cache_key(exam):
+    return f'exams:answer-key:{exam.pk}:{exam_version(exam)}'
+
+
+def get_answer_key(exam):
+    """
+    Return the AnswerKey for ``exam``, building and caching it on a miss.
+    Also memoized on the instance so one request never hits the cache twice.
+    """
+    answer_key = getattr(exam, '_answer_key', None)
+    if answer_key is None:
+        cache_key = answer_key_cache_key(exam)
+        answer_key = cache.get(cache_key)
+        if answer_key is None:
+            answer_key = AnswerKey.build(exam.pk)
+            cache.set(cache_key, answer_key, settings.ANSWER_KEY_CACHE_TIMEOUT)
+        exam._answer_key = answer_key
+    return answer_key
+
+
+def touch_exam(exam_id):
+    """Move ``exam_id`` to a new version so its cached answer key is dropped."""
+    Exam.objects.filter(pk=exam_id).update(updated_at=timezone.now())
@@ -0,0 +1,84 @@
+"""
+Streaming exports of exam papers (questions with their choices).
+
+Questions are read with ``.iterator()`` in chunks, each chunk's choices
+prefetched in one query, and rendered row by row, so a whole question bank can
+be dumped in constant memory. CSV rows get one ``option_N`` column per choice,
+sized to the largest question in the export, and a ``correct_option`` column
+holding the correct choice texts as a JSON list (choice text may contain any
+separator).
+"""
+import json
+
+from django.db.models import Count, Max, Prefetch
+
+from elearning.streaming import iter_csv, iter_jsonl
+
+from .models import Choice, Question
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+CHUNK_SIZE = 2000
+
+CSV_COLUMNS = ['exam_id', 'exam_title', 'subject', 'examination_type', 'year',
+               'question_id', 'order', 'question_type', 'marks', 'question_text']
+
+
+def export_questions_queryset(exams):
+    return Question.objects.filter(exam__in=exams).select_related(
+        'exam__subject', 'exam__examination_type'
+    ).prefetch_related(
+        Prefetch('choices', queryset=Choice.objects.order_by('id'))
+    ).order_by('exam_id', 'order', 'id')
+
+
+def max_choice_count(questions):
+    return questions.order_by().annotate(
+        choice_count=Count('choices')
+    ).aggregate(most=Max('choice_count'))['most'] or 0
+
+
+def question_record(question):
+    exam = question.exam
+    return {
+        'exam_id': exam.id,
+        'exam_title': exam.title,
+        'subject': exam.subject.name,
+        'examination_type': exam.examination_type.name if exam.examination_type else None,
+        'year': exam.year,
+        'question_id': question.id,
+        'order': question.order,
+        'question_type': question.question_type,
+        'marks': question.marks,
+        'question_text': question.question_text,
+        'choices': [
+            {'choice_text': choice.choice_text, 'is_correct': choice.is_correct}
+            for choice in question.choices.all()
+        ],
+    }
+
+
+def iter_question_records(questions):
+    for question in questions.iterator(chunk_size=CHUNK_SIZE):
+        yield question_record(question)
+
+
+def csv_rows(questions):
+    option_count = max_choice_count(questions)
+    yield CSV_COLUMNS + [f'option_{n}' for n in range(1, option_count + 1)] + ['correct_option']
+    for record in iter_question_records(questions):
+        options = [choice['choice_text'] or '' for choice in record['choices']]
+        correct = [choice['choice_text'] or '' for choice in record['choices'] if choice['is_correct']]
+        yield (
+            [record[column] for column in CSV_COLUMNS]
+            + options + [''] * (option_count - len(options))
+            + [json.dumps(correct, ensure_ascii=False)]
+        )
+
+
+def export_questions(exams, output='csv'):
+    """Return an iterator of text chunks exporting ``exams`` as ``output``."""
+    questions = export_questions_queryset(exams)
+    if output == 'jsonl':
+        return iter_jsonl(iter_question_records(questions))
+    return iter_csv(csv_rows(questions))
@@ -0,0 +1,71 @@
+"""
+Server-side grading of exam submissions.
+
+The exam's cached AnswerKey is used to score a submission in a single pass,
+then the Answer rows, the attempt and (through the attempt_graded signal)
+ExamProgress and the analytics rollups are written in one transaction.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+
+from .answer_keys import get_answer_key
+from .models import Answer, ExamAttempt
+from .signals import attempt_graded
+from .utils import normalize_text
+
+# Question types graded automatically against their choices
+AUTO_GRADED_TYPES = ('multiple_choice', 'true_false')
+
+
+def resolve_choice(answer_key, index, answer_text):
+    # Clients may send either the choice id or the choice text; ids win
+    answer_text = (answer_text or '').strip()
+    if answer_text.isdigit() and int(answer_text) in answer_key.choice_ids[index]:
+        return int(answer_text)
+    return answer_key.choice_texts[index].get(normalize_text(answer_text))
+
+
+def score_answer(answer_key, index, choice_id):
+    correct = answer_key.correct_choice_ids[index]
+    if answer_key.question_types[index] in AUTO_GRADED_TYPES or correct:
+        return answer_key.marks[index] if choice_id in correct else 0
+    # Short answers without a key and essays are left for manual marking
+    return None
+
+
+def grade_submission(attempt, answers):
+    """
+    Score ``answers`` (dicts with `question` id and `answer_text`) for
+    ``attempt`` and persist the result. Returns the updated attempt.
+    """
+    answer_key = get_answer_key(attempt.exam)
+    rows = []
+    score = 0
+    for answer in answers:
+        index = answer_key.positions[answer['question']]
+        choice_id = resolve_choice(answer_key, index, answer['answer_text'])
+        marks = score_answer(answer_key, index, choice_id)
+        score += marks or 0
+        rows.append(Answer(
+            attempt=attempt,
+            question_id=answer['question'],
+            answer_text=answer['answer_text'],
+            selected_choice_id=choice_id,
+            marks_obtained=marks,
+        ))
+
+    end_time = timezone.now()
+    with transaction.atomic():
+        # Conditional update so two concurrent submissions can't both grade
+        completed = ExamAttempt.objects.filter(pk=attempt.pk, is_completed=False).update(
+            is_completed=True, score=score, end_time=end_time
+        )
+        if not completed:
+            raise PermissionDenied("This exam attempt has already been completed.")
+        Answer.objects.bulk_create(rows)
+        attempt.is_completed = True
+        attempt.score = score
+        attempt.end_time = end_time
+        attempt_graded.send(sender=ExamAttempt, attempt=attempt)
+    return attempt
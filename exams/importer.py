@@ -0,0 +1,237 @@
+"""
+Bulk question-bank imports in the format written by exams.export.
+
+Records are streamed from the file, validated and grouped into chunks; each
+chunk is written through ``ingest_questions`` (bulk_create, deduplicated by
+question text) inside its own transaction, so a failure only rolls back the
+chunk it happened in and memory stays bounded by the chunk size.
+"""
+import csv
+import json
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from courses.subjects.models import Subject
+from users.models import ExaminationType
+
+from .ingest import ingest_questions
+from .models import Exam, Question
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+CHUNK_SIZE = 1000
+
+# Only the first few invalid rows are reported back in detail
+MAX_REPORTED_ERRORS = 100
+
+QUESTION_TYPES = {value for value, label in Question.QUESTION_TYPES}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def parse_correct_option(value, option_texts):
+    """
+    The correct choice texts in a CSV ``correct_option`` cell: a JSON list as
+    written by exams.export, or a single answer text as in scraper output.
+    Older exports joined several answers with '|'; that is only split when
+    the cell is not itself one of the options.
+    """
+    value = value or ''
+    if value.startswith('['):
+        try:
+            correct = json.loads(value)
+        except ValueError:
+            pass
+        else:
+            if isinstance(correct, list):
+                return {str(text) for text in correct if text}
+    if not value or value in option_texts:
+        return {value} - {''}
+    return set(filter(None, value.split('|')))
+
+
+def iter_csv_records(lines):
+    for record in csv.DictReader(lines):
+        options = sorted(
+            (int(column[len('option_'):]), value)
+            for column, value in record.items()
+            if column and column.startswith('option_') and column[len('option_'):].isdigit()
+        )
+        correct = parse_correct_option(record.get('correct_option'), {text for position, text in options})
+        record['choices'] = [
+            {'choice_text': text, 'is_correct': text in correct}
+            for position, text in options if text
+        ]
+        yield record
+
+
+def iter_jsonl_records(lines):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            record = {'_error': f'Invalid JSON: {exc}'}
+        yield record
+
+
+def parse_int(record, field, default=None):
+    value = record.get(field)
+    if value in (None, ''):
+        if default is None:
+            raise InvalidRecord(f'{field} is required')
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f'{field} must be an integer')
+    if value < 0:
+        raise InvalidRecord(f'{field} must not be negative')
+    return value
+
+
+def parse_text(record, field, max_length=None):
+    value = record.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise InvalidRecord(f'{field} must be a string')
+    value = value.strip()
+    if max_length and len(value) > max_length:
+        raise InvalidRecord(f'{field} is longer than {max_length} characters')
+    return value
+
+
+def clean_record(record):
+    """Validate an import record; returns (exam key, ingest row)."""
+    if not isinstance(record, dict):
+        raise InvalidRecord('Expected an object')
+    if '_error' in record:
+        raise InvalidRecord(record['_error'])
+
+    question_text = parse_text(record, 'question_text')
+    if not question_text:
+        raise InvalidRecord('question_text is required')
+    question_type = parse_text(record, 'question_type') or 'multiple_choice'
+    if question_type not in QUESTION_TYPES:
+        raise InvalidRecord(f'Unknown question_type {question_type!r}')
+
+    choices = record.get('choices') or []
+    if not isinstance(choices, list) or not all(
+        isinstance(choice, dict) and isinstance(choice.get('choice_text'), str) and choice['choice_text']
+        for choice in choices
+    ):
+        raise InvalidRecord('choices must be a list of objects with a choice_text string')
+    if any(len(choice['choice_text']) > 200 for choice in choices):
+        raise InvalidRecord('choice_text is longer than 200 characters')
+    if question_type in ('multiple_choice', 'true_false') and not any(choice.get('is_correct') for choice in choices):
+        raise InvalidRecord('No correct choice')
+
+    exam_key = (
+        parse_text(record, 'exam_title', Exam._meta.get_field('title').max_length),
+        parse_text(record, 'subject', Subject._meta.get_field('name').max_length),
+        parse_text(record, 'examination_type', ExaminationType._meta.get_field('name').max_length),
+        parse_int(record, 'year', 0),
+    )
+    row = {
+        'question_text': question_text,
+        'question_type': question_type,
+        'marks': parse_int(record, 'marks', 1),
+        'order': parse_int(record, 'order', 0),
+        'choices': [
+            {'choice_text': choice['choice_text'], 'is_correct': bool(choice.get('is_correct'))}
+            for choice in choices
+        ],
+    }
+    return exam_key, row
+
+
+class ExamResolver:
+    """Maps (title, subject, examination type, year) to an Exam, creating it once."""
+
+    def __init__(self):
+        self.exams = {}
+
+    def __call__(self, exam_key):
+        if exam_key not in self.exams:
+            self.exams[exam_key] = self.get_or_create(*exam_key)
+        return self.exams[exam_key]
+
+    def get_or_create(self, title, subject_name, examination_type_name, year):
+        if not (title and subject_name and year):
+            raise InvalidRecord('exam_title, subject and year are required without a target exam')
+        subject, _ = Subject.objects.get_or_create(name=subject_name)
+        examination_type = None
+        if examination_type_name:
+            examination_type, _ = ExaminationType.objects.get_or_create(name=examination_type_name)
+        exam, _ = Exam.objects.get_or_create(
+            subject=subject,
+            title=title,
+            examination_type=examination_type,
+            year=year,
+            defaults={
+                "description": title,
+                "duration": timezone.timedelta(seconds=3600),
+                "total_marks": 100,
+                "passing_marks": 40,
+                "start_time": timezone.now(),
+                "end_time": timezone.now() + timezone.timedelta(hours=1),
+            }
+        )
+        return exam
+
+
+def import_questions(lines, input_format='csv', exam=None, chunk_size=CHUNK_SIZE,
+                     update_existing=True, on_chunk=None):
+    """
+    Import question records from ``lines`` (an iterable of text lines). Rows go
+    into ``exam`` when given, otherwise into the exam named by each record,
+    which is created if missing. ``on_chunk(report)`` is called after each
+    committed chunk. Returns the report dict.
+    """
+    records = iter_jsonl_records(lines) if input_format == 'jsonl' else iter_csv_records(lines)
+    resolve_exam = ExamResolver()
+    report = {
+        'rows': 0, 'created': 0, 'updated': 0, 'skipped': 0, 'invalid': 0,
+        'errors': [], 'seconds': 0.0, 'rows_per_second': 0.0,
+    }
+    started = time.monotonic()
+
+    def flush(chunk):
+        with transaction.atomic():
+            for target, rows in chunk.items():
+                stats = ingest_questions(target, rows, update_existing=update_existing)
+                for key in ('created', 'updated', 'skipped'):
+                    report[key] += stats[key]
+        elapsed = time.monotonic() - started
+        report['seconds'] = round(elapsed, 3)
+        report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed else 0.0
+        if on_chunk:
+            on_chunk(report)
+
+    chunk = {}
+    pending = 0
+    for line_number, record in enumerate(records, start=1):
+        report['rows'] += 1
+        try:
+            exam_key, row = clean_record(record)
+            target = exam or resolve_exam(exam_key)
+        except InvalidRecord as exc:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'record': line_number, 'error': str(exc)})
+            continue
+        chunk.setdefault(target, []).append(row)
+        pending += 1
+        if pending >= chunk_size:
+            flush(chunk)
+            chunk = {}
+            pending = 0
+    flush(chunk)
+    return report
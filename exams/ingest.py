@@ -0,0 +1,134 @@
+"""
+Bulk question ingestion for scrapes and imports.
+
+Incoming rows are matched to the exam's existing questions by
+Question.text_hash, so re-running a scrape updates questions in place instead
+of duplicating them. New questions and choices are written with bulk_create
+inside one transaction: a fresh paper costs a handful of queries however many
+questions it has.
+
+A row is a dict with ``question_text``, ``choices`` (a list of dicts with
+``choice_text`` and ``is_correct``) and optionally ``question_type``,
+``marks`` and ``order``.
+"""
+from django.db import transaction
+
+from .answer_keys import touch_exam
+from .models import Choice, Question
+from .utils import normalize_text, question_text_hash
+
+QUESTION_FIELDS = ('question_type', 'marks', 'order')
+
+# Keeps `text_hash IN (...)` lookups under every backend's parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+def scraped_question_row(scraped, order):
+    """Convert a scraped {'question', 'options', 'answer'} dict into a row."""
+    answer = normalize_text(scraped.get('answer'))
+    return {
+        'question_text': scraped.get('question'),
+        'question_type': 'multiple_choice',
+        'marks': 1,
+        'order': order,
+        'choices': [
+            {'choice_text': option, 'is_correct': bool(answer) and normalize_text(option) == answer}
+            for option in scraped.get('options', [])
+        ],
+    }
+
+
+def ingest_questions(exam, rows, update_existing=True):
+    """
+    Upsert ``rows`` into ``exam``. Existing questions get their type, marks,
+    order and choice correctness updated (or are left alone when
+    ``update_existing`` is False); choices are matched by normalized text and
+    never deleted, so earlier answers keep pointing at them.
+
+    Returns a dict of created/updated/skipped counts.
+    """
+    stats = {'created': 0, 'updated': 0, 'skipped': 0}
+
+    incoming = {}
+    for row in rows:
+        if not row.get('question_text'):
+            stats['skipped'] += 1
+            continue
+        text_hash = question_text_hash(row['question_text'])
+        if text_hash in incoming:
+            stats['skipped'] += 1
+            continue
+        incoming[text_hash] = row
+    if not incoming:
+        return stats
+
+    with transaction.atomic():
+        hashes = list(incoming)
+        existing = {}
+        for start in range(0, len(hashes), LOOKUP_BATCH_SIZE):
+            questions = Question.objects.filter(
+                exam=exam, text_hash__in=hashes[start:start + LOOKUP_BATCH_SIZE]
+            ).prefetch_related('choices')
+            existing.update((question.text_hash, question) for question in questions)
+
+        new_questions = []
+        questions_to_update = []
+        choices_to_create = []
+        choices_to_update = []
+        for text_hash, row in incoming.items():
+            question = existing.get(text_hash)
+            if question is None:
+                question = Question(
+                    exam=exam,
+                    question_text=row['question_text'],
+                    question_type=row.get('question_type', 'multiple_choice'),
+                    marks=row.get('marks', 1),
+                    order=row.get('order', 0),
+                    text_hash=text_hash,
+                )
+                new_questions.append((question, row.get('choices', [])))
+                continue
+
+            if not update_existing:
+                stats['skipped'] += 1
+                continue
+
+            changed = False
+            fields_changed = False
+            for field in QUESTION_FIELDS:
+                if field in row and getattr(question, field) != row[field]:
+                    setattr(question, field, row[field])
+                    fields_changed = True
+            if fields_changed:
+                questions_to_update.append(question)
+                changed = True
+
+            current = {normalize_text(choice.choice_text): choice for choice in question.choices.all()}
+            for choice_row in row.get('choices', []):
+                choice = current.get(normalize_text(choice_row['choice_text']))
+                if choice is None:
+                    choices_to_create.append(Choice(question=question, **choice_row))
+                    changed = True
+                elif choice.is_correct != choice_row['is_correct']:
+                    choice.is_correct = choice_row['is_correct']
+                    choices_to_update.append(choice)
+                    changed = True
+
+            stats['updated' if changed else 'skipped'] += 1
+
+        Question.objects.bulk_create([question for question, choices in new_questions], batch_size=500)
+        for question, choices in new_questions:
+            choices_to_create.extend(Choice(question_id=question.pk, **choice_row) for choice_row in choices)
+        stats['created'] = len(new_questions)
+
+        Choice.objects.bulk_create(choices_to_create, batch_size=1000)
+        if questions_to_update:
+            Question.objects.bulk_update(questions_to_update, QUESTION_FIELDS, batch_size=500)
+        if choices_to_update:
+            Choice.objects.bulk_update(choices_to_update, ['is_correct'], batch_size=1000)
+
+        # bulk writes skip the Question/Choice signals that version the answer key
+        if stats['created'] or stats['updated']:
+            touch_exam(exam.pk)
+
+    return stats
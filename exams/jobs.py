@@ -0,0 +1,134 @@
+"""
+Background scrape jobs.
+
+The scrape endpoint only records a pending ScrapeJob; ``run_scrape_worker``
+processes claim jobs with a conditional UPDATE (pending -> running), so any
+number of workers can drain the queue in parallel without running a job twice.
+Running jobs heartbeat as pages arrive and between the ingest and export
+steps, and a job whose worker died is put back in the queue once its
+heartbeat goes stale. Workers finish a job only while they still own it.
+"""
+import csv
+import datetime
+import os
+
+from django.conf import settings
+from django.utils import timezone
+
+from courses.subjects.models import Subject
+from users.models import ExaminationType
+
+from .ingest import ingest_questions, scraped_question_row
+from .models import Exam, ScrapeJob
+from .scraper import scrape_past_questions
+
+
+def claim_next_job(worker, candidates=10):
+    """Atomically take the oldest pending job for ``worker``, or return None."""
+    pending = ScrapeJob.objects.filter(status='pending').order_by('created_at').values_list('pk', flat=True)
+    for pk in pending[:candidates]:
+        now = timezone.now()
+        claimed = ScrapeJob.objects.filter(pk=pk, status='pending').update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return ScrapeJob.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale_jobs(timeout):
+    """Return running jobs whose last heartbeat is older than ``timeout`` to the queue."""
+    return ScrapeJob.objects.filter(
+        status='running', heartbeat_at__lt=timezone.now() - timeout
+    ).update(status='pending', worker='', pages_fetched=0)
+
+
+def get_scraped_exam(subject_name, year):
+    subject, _ = Subject.objects.get_or_create(name=subject_name)
+    exam, _ = Exam.objects.get_or_create(
+        subject=subject,
+        title=f"JAMB {year} {subject_name}",
+        examination_type=ExaminationType.objects.get(name='JAMB'),
+        defaults={
+            "description": f"JAMB {year} {subject_name} Questions",
+            "duration": timezone.timedelta(seconds=3600),
+            "total_marks": 100,
+            "year": year,
+            "passing_marks": 40,
+            "start_time": timezone.now(),
+            "end_time": timezone.now() + timezone.timedelta(hours=1),
+            "is_published": True,
+        }
+    )
+    return exam
+
+
+def write_questions_csv(questions):
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    csv_filename = f'scraped_questions_{timestamp}.csv'
+    csv_path = os.path.join("media", csv_filename)
+
+    option_count = max((len(q['options']) for q in questions), default=4)
+    header = (['question_text'] + [f'option_{n}' for n in range(1, option_count + 1)]
+              + ['correct_option'])
+
+    os.makedirs("media", exist_ok=True)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        for q in questions:
+            options = q['options'] + [''] * (option_count - len(q['options']))
+            writer.writerow([q['question'], *options, q['answer'] or ''])
+    return csv_filename
+
+
+def heartbeat(job, **fields):
+    """
+    Record that ``job``'s worker is alive, writing ``fields`` with it.
+    Returns False once the job has been requeued away from this worker.
+    """
+    return bool(ScrapeJob.objects.filter(pk=job.pk, worker=job.worker, status='running').update(
+        heartbeat_at=timezone.now(), **fields
+    ))
+
+
+def run_scrape_job(job):
+    """
+    Scrape, store and export one claimed job, recording the outcome on it.
+    If the job was requeued meanwhile (see requeue_stale_jobs) the outcome is
+    dropped and the job is returned as it now stands in the database.
+    """
+    def on_progress(done, total):
+        job.pages_fetched = done
+        heartbeat(job, pages_fetched=done)
+
+    try:
+        questions = scrape_past_questions(
+            job.slug, job.year, job.pages, on_progress=on_progress, base_url=settings.SCRAPER_BASE_URL
+        )
+        heartbeat(job)
+        exam = get_scraped_exam(job.subject_name, job.year)
+        ingested = ingest_questions(exam, [
+            scraped_question_row(q, order) for order, q in enumerate(questions, start=1)
+        ])
+        heartbeat(job)
+        csv_filename = write_questions_csv(questions)
+    except Exception as exc:
+        job.status = 'failed'
+        job.error = f'{type(exc).__name__}: {exc}'
+    else:
+        job.status = 'completed'
+        job.exam = exam
+        job.result = {
+            'questions_scraped': len(questions),
+            'questions_created': ingested['created'],
+            'questions_updated': ingested['updated'],
+            'csv_file': csv_filename,
+        }
+    job.finished_at = timezone.now()
+    # Conditional, so a run that lost the job can't overwrite the rerun's outcome
+    finished = heartbeat(job, status=job.status, error=job.error, exam=job.exam, result=job.result,
+                         pages_fetched=job.pages_fetched, finished_at=job.finished_at)
+    if not finished:
+        job.refresh_from_db()
+    return job
@@ -0,0 +1,129 @@
+"""
+Exam leaderboards and percentiles.
+
+Percentiles are read off score histograms rather than by counting attempts:
+ExamAnalytics.score_counts for a single paper (see exams.analytics) and
+ExaminationTypeAnalytics.percent_counts, in whole percent of the paper's
+total marks, across every paper of an examination type. Both are folded in
+as attempts are graded, and a histogram has at most one entry per possible
+score, so a lookup costs the same at a hundred attempts or at a million.
+
+Top-N lists walk the (exam, -score, end_time) index of ExamAttempt with
+keyset pagination; ranks come from the same histogram so they agree with
+the percentiles. ``manage.py rebuild_exam_analytics`` recomputes both kinds
+of histogram.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from .analytics import get_exam_analytics
+from .models import Exam, ExamAttempt, ExaminationTypeAnalytics
+
+
+def score_percent(score, total_marks):
+    return min(score * 100 // total_marks, 100) if total_marks else 0
+
+
+def graded_attempts():
+    return ExamAttempt.objects.filter(is_completed=True, score__isnull=False)
+
+
+def locked_type_analytics(examination_type_id):
+    """The type's ExaminationTypeAnalytics row, created if missing and locked until the transaction ends."""
+    return ExaminationTypeAnalytics.objects.select_for_update().get_or_create(
+        examination_type_id=examination_type_id
+    )[0]
+
+
+def rebuild_type_analytics(examination_type_id):
+    """Recompute an examination type's percent histogram from its graded attempts."""
+    with transaction.atomic():
+        # As in exams.analytics: committed attempts are already folded in, and
+        # ones being graded meanwhile wait for the lock and land on top
+        analytics = locked_type_analytics(examination_type_id)
+        counts = Counter()
+        for score, total_marks, total in graded_attempts().filter(
+            exam__examination_type_id=examination_type_id
+        ).order_by().values_list('score', 'exam__total_marks').annotate(total=Count('pk')):
+            counts[str(score_percent(score, total_marks))] += total
+        analytics.attempts = sum(counts.values())
+        analytics.percent_counts = dict(counts)
+        analytics.save()
+    return analytics
+
+
+def record_type_attempt(attempt):
+    """
+    Fold ``attempt`` into its examination type's histogram, from inside the
+    transaction grading it. Types with graded attempts always have a row
+    (rebuilt rather than dropped when papers move, see exams.signals), so
+    this only ever adds.
+    """
+    examination_type_id, total_marks = Exam.objects.filter(pk=attempt.exam_id).values_list(
+        'examination_type_id', 'total_marks'
+    ).get()
+    if examination_type_id is None:
+        return
+    key = str(score_percent(attempt.score, total_marks))
+    with transaction.atomic():
+        analytics = locked_type_analytics(examination_type_id)
+        analytics.attempts += 1
+        analytics.percent_counts[key] = analytics.percent_counts.get(key, 0) + 1
+        analytics.save()
+
+
+def get_type_analytics(examination_type):
+    return (ExaminationTypeAnalytics.objects.filter(pk=examination_type.pk).first()
+            or rebuild_type_analytics(examination_type.pk))
+
+
+def score_ranks(counts):
+    """``{score: rank}`` for every score in a histogram, 1 being the best."""
+    ranks = {}
+    ahead = 0
+    for score, total in sorted(((int(score), total) for score, total in counts.items()), reverse=True):
+        ranks[score] = ahead + 1
+        ahead += total
+    return ranks
+
+
+def standing(counts, score):
+    """Where ``score`` falls in a histogram: its rank and the share of attempts below it."""
+    total = below = ahead = 0
+    for key, count in counts.items():
+        total += count
+        if int(key) < score:
+            below += count
+        elif int(key) > score:
+            ahead += count
+    return {
+        'rank': ahead + 1,
+        'percentile': round(below / total * 100, 2) if total else None,
+        'attempts': total,
+    }
+
+
+def exam_standing(exam, student):
+    """``student``'s best score on ``exam`` against every graded attempt at it, or None."""
+    best = graded_attempts().filter(exam=exam, student=student).aggregate(best=Max('score'))['best']
+    if best is None:
+        return None
+    return {'best_score': best, **standing(get_exam_analytics(exam).score_counts, best)}
+
+
+def type_standing(examination_type, student):
+    """
+    ``student``'s best percent on ``examination_type``'s papers against
+    every graded attempt at them, or None.
+    """
+    best = max((
+        score_percent(score, total_marks)
+        for total_marks, score in graded_attempts().filter(
+            exam__examination_type=examination_type, student=student
+        ).order_by().values_list('exam__total_marks').annotate(best=Max('score'))
+    ), default=None)
+    if best is None:
+        return None
+    return {'best_percent': best, **standing(get_type_analytics(examination_type).percent_counts, best)}
@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from exams.export import EXPORT_FORMATS, export_questions
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = 'Streams exam questions and choices as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append', dest='exams',
+                            help='Exam id to export (repeatable); defaults to every exam')
+        parser.add_argument('--subject', type=int, help='Only exams for this subject id')
+        parser.add_argument('--examination-type', type=int, help='Only exams of this examination type id')
+        parser.add_argument('--year', type=int, help='Only exams from this year')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv', dest='output_format')
+        parser.add_argument('--output', '-o', help='File to write to; defaults to stdout')
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.all()
+        if options['exams']:
+            exams = exams.filter(pk__in=options['exams'])
+        if options['subject']:
+            exams = exams.filter(subject=options['subject'])
+        if options['examination_type']:
+            exams = exams.filter(examination_type=options['examination_type'])
+        if options['year']:
+            exams = exams.filter(year=options['year'])
+
+        chunks = export_questions(exams, options['output_format'])
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as out:
+                out.writelines(chunks)
+            self.stderr.write(self.style.SUCCESS(f"Exported to {options['output']}"))
+        else:
+            sys.stdout.writelines(chunks)
@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.importer import CHUNK_SIZE, IMPORT_FORMATS, import_questions
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = 'Imports questions and choices from a CSV or JSON Lines export in chunked bulk transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for stdin")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, dest='input_format',
+                            help='Defaults to the file extension, else csv')
+        parser.add_argument('--exam', type=int,
+                            help='Import every row into this exam instead of the exams named in the file')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--skip-existing', action='store_true',
+                            help='Leave questions that already exist untouched instead of updating them')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        input_format = options['input_format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        exam = None
+        if options['exam']:
+            try:
+                exam = Exam.objects.get(pk=options['exam'])
+            except Exam.DoesNotExist:
+                raise CommandError(f"Exam {options['exam']} does not exist")
+
+        def on_chunk(report):
+            self.stderr.write(
+                f"{report['rows']} rows, {report['created']} created, {report['updated']} updated, "
+                f"{report['invalid']} invalid ({report['rows_per_second']} rows/s)"
+            )
+
+        source = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        try:
+            report = import_questions(
+                source, input_format, exam=exam, chunk_size=options['chunk_size'],
+                update_existing=not options['skip_existing'], on_chunk=on_chunk,
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        for error in report['errors']:
+            self.stderr.write(self.style.WARNING(f"Record {error['record']}: {error['error']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} rows in {report['seconds']}s ({report['rows_per_second']} rows/s): "
+            f"{report['created']} created, {report['updated']} updated, "
+            f"{report['skipped']} unchanged, {report['invalid']} invalid"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from exams.analytics import rebuild_exam_analytics
+from exams.leaderboard import rebuild_type_analytics
+from exams.models import Exam
+from users.models import ExaminationType
+
+
+class Command(BaseCommand):
+    help = ('Recomputes exam analytics (score distribution, item statistics) and the examination '
+            'type percentile histograms from graded attempts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', type=int, action='append',
+                            help='Only rebuild this exam (repeatable)')
+
+    def handle(self, *args, **options):
+        exams = Exam.objects.filter(attempts__is_completed=True).distinct().order_by('pk')
+        if options['exam']:
+            exams = Exam.objects.filter(pk__in=options['exam']).order_by('pk')
+
+        rebuilt = 0
+        for exam in exams.iterator():
+            analytics = rebuild_exam_analytics(exam)
+            rebuilt += 1
+            self.stdout.write(f'{exam.pk}: {analytics.attempts} attempt(s)')
+
+        # Percentiles across papers, for the examination types of those exams
+        types_rebuilt = 0
+        examination_types = ExaminationType.objects.filter(pk__in=exams.order_by().values('examination_type'))
+        for examination_type in examination_types.order_by('pk'):
+            analytics = rebuild_type_analytics(examination_type.pk)
+            types_rebuilt += 1
+            self.stdout.write(f'{examination_type.name}: {analytics.attempts} attempt(s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt analytics for {rebuilt} exam(s) and {types_rebuilt} examination type(s)'
+        ))
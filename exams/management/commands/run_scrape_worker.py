@@ -0,0 +1,48 @@
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from exams.jobs import claim_next_job, requeue_stale_jobs, run_scrape_job
+
+
+class Command(BaseCommand):
+    help = 'Processes queued past-question scrape jobs; run several to scrape in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll-interval', type=float, default=5,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=15,
+                            help='Minutes without a heartbeat before a running job is requeued')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stale_after = timedelta(minutes=options['stale_after'])
+        self.stdout.write(f'Scrape worker {worker} started')
+
+        while True:
+            requeued = requeue_stale_jobs(stale_after)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+            job = claim_next_job(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Running {job}')
+            job = run_scrape_job(job)
+            if job.worker != worker or job.status in ('pending', 'running'):
+                self.stderr.write(self.style.WARNING(
+                    f'Job {job.pk} was requeued while running here; its result was discarded'
+                ))
+            elif job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f'Job {job.pk} completed: {job.result}'))
+            else:
+                self.stderr.write(self.style.ERROR(f'Job {job.pk} failed: {job.error}'))
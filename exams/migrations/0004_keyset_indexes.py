@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_search_index'),
+        ('exams', '0003_exam_examination_type_exam_year'),
+        ('users', '0003_examinationtype_alter_user_examination_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['-year', '-id'], name='exam_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['examination_type', '-year', '-id'], name='exam_type_year_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['exam', 'order', 'id'], name='question_exam_order_idx'),
+        ),
+    ]
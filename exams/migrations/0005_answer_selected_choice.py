@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='answer',
+            name='selected_choice',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='selections', to='exams.choice'),
+        ),
+    ]
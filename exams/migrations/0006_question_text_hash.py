@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:53
+
+from django.db import migrations, models
+
+
+def backfill_text_hash(apps, schema_editor):
+    from exams.utils import question_text_hash
+    Question = apps.get_model('exams', 'Question')
+    batch = []
+    for question in Question.objects.only('id', 'question_text').iterator(chunk_size=2000):
+        question.text_hash = question_text_hash(question.question_text)
+        batch.append(question)
+        if len(batch) >= 2000:
+            Question.objects.bulk_update(batch, ['text_hash'])
+            batch = []
+    if batch:
+        Question.objects.bulk_update(batch, ['text_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0005_answer_selected_choice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='text_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['exam', 'text_hash'], name='question_exam_hash_idx'),
+        ),
+        migrations.RunPython(backfill_text_hash, migrations.RunPython.noop),
+    ]
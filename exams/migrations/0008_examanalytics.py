@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_scrapejob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAnalytics',
+            fields=[
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics', serialize=False, to='exams.exam')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('passed', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.PositiveBigIntegerField(default=0)),
+                ('score_square_sum', models.PositiveBigIntegerField(default=0)),
+                ('score_counts', models.JSONField(default=dict)),
+                ('question_stats', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'exam analytics',
+            },
+        ),
+    ]
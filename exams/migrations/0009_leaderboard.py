@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_examanalytics'),
+        ('users', '0004_user_type_name_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExaminationTypeAnalytics',
+            fields=[
+                ('examination_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='analytics', serialize=False, to='users.examinationtype')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('percent_counts', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'examination type analytics',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', '-score', 'end_time'], name='attempt_exam_score_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0009_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examattempt',
+            name='paper_version',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='examattempt',
+            name='question_order',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
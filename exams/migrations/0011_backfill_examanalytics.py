@@ -0,0 +1,39 @@
+import itertools
+
+from django.db import migrations
+
+
+def backfill_exam_analytics(apps, schema_editor):
+    # Grading only adds to existing rows from now on, so every exam needs one
+    # built from the attempts graded so far
+    from exams.analytics import ExamTotals
+
+    Exam = apps.get_model('exams', 'Exam')
+    ExamAnalytics = apps.get_model('exams', 'ExamAnalytics')
+    ExamAttempt = apps.get_model('exams', 'ExamAttempt')
+    Answer = apps.get_model('exams', 'Answer')
+
+    for exam in Exam.objects.filter(analytics__isnull=True).iterator():
+        scores = dict(ExamAttempt.objects.filter(
+            exam=exam, is_completed=True, score__isnull=False
+        ).values_list('id', 'score'))
+        answers = Answer.objects.filter(attempt_id__in=list(scores)).order_by('attempt_id').values_list(
+            'attempt_id', 'question_id', 'selected_choice_id', 'marks_obtained'
+        )
+        totals = ExamTotals()
+        for attempt_id, rows in itertools.groupby(answers.iterator(), key=lambda row: row[0]):
+            totals.add_attempt(scores.pop(attempt_id), exam.passing_marks, (row[1:] for row in rows))
+        for score in scores.values():
+            totals.add_attempt(score, exam.passing_marks, ())
+        totals.save_to(ExamAnalytics(exam=exam))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_examattempt_question_order'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_exam_analytics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill_type_analytics(apps, schema_editor):
+    # Grading only adds to existing rows from now on, so every examination
+    # type with graded attempts needs one built from them
+    ExaminationTypeAnalytics = apps.get_model('exams', 'ExaminationTypeAnalytics')
+    ExamAttempt = apps.get_model('exams', 'ExamAttempt')
+
+    counts = {}
+    for type_id, score, total_marks, total in ExamAttempt.objects.filter(
+        is_completed=True, score__isnull=False, exam__examination_type__isnull=False,
+        exam__examination_type__analytics__isnull=True,
+    ).order_by().values_list('exam__examination_type', 'score', 'exam__total_marks').annotate(total=Count('pk')):
+        percent = min(score * 100 // total_marks, 100) if total_marks else 0
+        counts.setdefault(type_id, Counter())[str(percent)] += total
+    ExaminationTypeAnalytics.objects.bulk_create([
+        ExaminationTypeAnalytics(examination_type_id=type_id, attempts=sum(percents.values()),
+                                 percent_counts=dict(percents))
+        for type_id, percents in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_backfill_examanalytics'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_type_analytics, migrations.RunPython.noop),
+    ]
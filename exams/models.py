@@ -1,8 +1,25 @@
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from courses.models import Course
 from courses.subjects.models import Subject
 from users.models import ExaminationType
+from .utils import question_text_hash
+
+class ExamQuerySet(models.QuerySet):
+
+    def with_question_count(self):
+        question_count = Question.objects.filter(
+            exam=OuterRef('pk')
+        ).order_by().values('exam').annotate(total=Count('pk')).values('total')
+        return self.select_related('subject', 'examination_type').annotate(
+            question_count=Coalesce(Subquery(question_count), 0)
+        )
+
+    def with_questions(self):
+        return self.select_related('subject', 'examination_type').prefetch_related('questions__choices')
+
 
 class Exam(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='exams_subjects')
@@ -18,6 +35,15 @@ class Exam(models.Model):
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ExamQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination over (year, id), optionally per examination type
+            models.Index(fields=['-year', '-id'], name='exam_year_id_idx'),
+            models.Index(fields=['examination_type', '-year', '-id'], name='exam_type_year_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.subject.name} - {self.title}"
@@ -35,13 +61,26 @@ class Question(models.Model):
     question_type = models.CharField(max_length=20, choices=QUESTION_TYPES)
     marks = models.PositiveIntegerField()
     order = models.PositiveIntegerField(default=0)
+    # sha256 of the normalized question text, used to deduplicate imports
+    text_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['exam', 'order', 'id'], name='question_exam_order_idx'),
+            models.Index(fields=['exam', 'text_hash'], name='question_exam_hash_idx'),
+        ]
     
     def __str__(self):
         return f"{self.exam.title} - Question {self.order}"
 
+    def save(self, *args, **kwargs):
+        self.text_hash = question_text_hash(self.question_text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'question_text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_hash'}
+        super().save(*args, **kwargs)
+
 class Choice(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='choices')
     choice_text = models.CharField(max_length=200, blank=True, null= True)
@@ -57,6 +96,17 @@ class ExamAttempt(models.Model):
     end_time = models.DateTimeField(null=True, blank=True)
     score = models.PositiveIntegerField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    # This attempt's permutation of the exam paper, as [question id, choice
+    # id, ...] per question, and the paper version it was last checked
+    # against (see exams.papers)
+    question_order = models.JSONField(default=list, blank=True)
+    paper_version = models.PositiveBigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Exam leaderboards, keyset-paginated best score first
+            models.Index(fields=['exam', '-score', 'end_time'], name='attempt_exam_score_idx'),
+        ]
     
     def __str__(self):
         return f"{self.student.username} - {self.exam.title}"
@@ -65,7 +115,83 @@ class Answer(models.Model):
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, related_name='answers')
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     answer_text = models.TextField()
+    selected_choice = models.ForeignKey(Choice, on_delete=models.SET_NULL, null=True, blank=True, related_name='selections')
     marks_obtained = models.PositiveIntegerField(null=True, blank=True)
     
     def __str__(self):
         return f"Answer for {self.question.question_text[:50]}..."
+
+class ScrapeJob(models.Model):
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+
+    subject_name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100)
+    year = models.PositiveIntegerField()
+    pages = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    pages_fetched = models.PositiveIntegerField(default=0)
+    exam = models.ForeignKey(Exam, on_delete=models.SET_NULL, null=True, blank=True, related_name='scrape_jobs')
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim the oldest pending job first
+            models.Index(fields=['status', 'created_at'], name='scrapejob_status_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Scrape {self.subject_name} {self.year} ({self.status})"
+
+class ExamAnalytics(models.Model):
+    """
+    Running totals over an exam's graded attempts, from which
+    exams.analytics derives the score distribution and item statistics.
+    """
+    exam = models.OneToOneField(Exam, on_delete=models.CASCADE, primary_key=True, related_name='analytics')
+    attempts = models.PositiveIntegerField(default=0)
+    passed = models.PositiveIntegerField(default=0)
+    score_sum = models.PositiveBigIntegerField(default=0)
+    score_square_sum = models.PositiveBigIntegerField(default=0)
+    # Score -> number of attempts with it
+    score_counts = models.JSONField(default=dict)
+    # Question id -> {'correct', 'correct_score_sum', 'choices': {choice id: selections}}
+    question_stats = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'exam analytics'
+
+    def __str__(self):
+        return f"Analytics for {self.exam.title}"
+
+
+class ExaminationTypeAnalytics(models.Model):
+    """
+    How many graded attempts on an examination type's papers landed on each
+    whole percent, for percentile lookups across papers with different
+    total marks (see exams.leaderboard).
+    """
+    examination_type = models.OneToOneField(ExaminationType, on_delete=models.CASCADE, primary_key=True,
+                                            related_name='analytics')
+    attempts = models.PositiveIntegerField(default=0)
+    # Percent (0-100) -> number of attempts with it
+    percent_counts = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'examination type analytics'
+
+    def __str__(self):
+        return f"Analytics for {self.examination_type.name}"
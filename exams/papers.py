@@ -0,0 +1,119 @@
+"""
+Exam papers as delivered to candidates.
+
+A Paper is an exam's questions and choices (without the answers),
+serialized to JSON once per exam version and cached like the answer keys,
+so a whole cohort starting a timed exam together reads one cache entry
+instead of querying and serializing the questions per candidate.
+
+Each attempt stores its own permutation when it is created
+(ExamAttempt.question_order): one ``[question id, choice id, ...]`` list
+per question. ``render_paper`` joins the cached JSON fragments in that
+order, so serving an attempt its paper is string concatenation. When the
+exam changes mid-attempt the order is carried over, see ``shuffle_paper``.
+"""
+import json
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.duration import duration_string
+from rest_framework.utils.encoders import JSONEncoder
+
+from .answer_keys import exam_version
+from .models import Question
+
+
+def to_json(data):
+    # Matches DRF's JSONRenderer output
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+class Paper:
+    __slots__ = ('exam_id', 'version', 'exam_json', 'questions')
+
+    def __init__(self, exam_id, version, exam_json, questions):
+        self.exam_id = exam_id
+        self.version = version
+        self.exam_json = exam_json
+        # Question id -> (the question's JSON up to its `choices` array,
+        # {choice id: choice JSON}), in paper order
+        self.questions = questions
+
+    def __len__(self):
+        return len(self.questions)
+
+    @classmethod
+    def build(cls, exam):
+        questions = {}
+        for question in Question.objects.filter(exam=exam).order_by('order', 'id').prefetch_related('choices'):
+            head = to_json({
+                'id': question.id,
+                'question_text': question.question_text,
+                'question_type': question.question_type,
+                'marks': question.marks,
+            })
+            questions[question.id] = (head[:-1] + ',"choices":[', {
+                choice.id: to_json({'id': choice.id, 'choice_text': choice.choice_text})
+                for choice in sorted(question.choices.all(), key=lambda choice: choice.id)
+            })
+        exam_json = to_json({
+            'id': exam.pk,
+            'title': exam.title,
+            'duration': duration_string(exam.duration),
+            'total_marks': exam.total_marks,
+            'passing_marks': exam.passing_marks,
+        })
+        return cls(exam.pk, exam_version(exam), exam_json, questions)
+
+
+def paper_cache_key(exam):
+    return f'exams:paper:{exam.pk}:{exam_version(exam)}'
+
+
+def get_paper(exam):
+    """Return the Paper for ``exam``, building and caching it on a miss."""
+    paper = getattr(exam, '_paper', None)
+    if paper is None:
+        cache_key = paper_cache_key(exam)
+        paper = cache.get(cache_key)
+        if paper is None:
+            paper = Paper.build(exam)
+            cache.set(cache_key, paper, settings.EXAM_PAPER_CACHE_TIMEOUT)
+        exam._paper = paper
+    return paper
+
+
+def shuffled(ids):
+    return random.sample(list(ids), len(ids))
+
+
+def shuffle_paper(paper, order=()):
+    """
+    A random question and choice order for one attempt at ``paper``.
+
+    Given the attempt's current ``order``, questions and choices still on the
+    paper keep their places; only ones added since are shuffled in (at the
+    end), so editing a live exam never reorders what a candidate has seen.
+    """
+    new_order = []
+    for question_id, *choice_ids in order:
+        if question_id not in paper.questions:
+            continue
+        choices = paper.questions[question_id][1]
+        kept = [choice_id for choice_id in choice_ids if choice_id in choices]
+        new_order.append([question_id, *kept, *shuffled(choices.keys() - set(kept))])
+    added = paper.questions.keys() - {question_id for question_id, *_ in new_order}
+    for question_id in shuffled(added):
+        new_order.append([question_id, *shuffled(paper.questions[question_id][1])])
+    return new_order
+
+
+def render_paper(paper, attempt):
+    """``attempt``'s paper as JSON, in the attempt's question_order."""
+    parts = []
+    for question_id, *choice_ids in attempt.question_order:
+        head, choices = paper.questions[question_id]
+        parts.append(head + ','.join(choices[choice_id] for choice_id in choice_ids) + ']}')
+    header = to_json({'attempt': attempt.pk, 'start_time': attempt.start_time})
+    return f'{header[:-1]},"exam":{paper.exam_json},"questions":[{",".join(parts)}]}}'
@@ -3,59 +3,20 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'elearning.settings')
 import django
 django.setup()
 
-import requests
-from bs4 import BeautifulSoup
-from bs4 import Tag
 import csv
 from django.utils import timezone
 import datetime
 
 from courses.subjects.models import Subject
-from exams.models import Exam, Question, Choice
+from exams.scraper import scrape_past_questions
+from exams.ingest import ingest_questions, scraped_question_row
+from exams.models import Exam
 from users.models import ExaminationType
 
-BASE_URL = 'https://nigerianscholars.com'
-BASE_PATH = '/past-questions/biology/jamb/year/2019/'
-page = 5
-
-headers = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-}
-
 MAX_PAGES = 9  # Set this to the number of pages you want to scrape
 
-questions = []
-
-for page in range(1, MAX_PAGES + 1):
-    if page == 1:
-        url = BASE_URL + BASE_PATH
-    else:
-        url = f"{BASE_URL}{BASE_PATH}page/{page}/"
-    print(f"Scraping: {url}")
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    page_questions = []
-    for q_div in soup.select('.question_block'):
-        question_el = q_div.select_one('.question_text')
-        question_text = question_el.get_text(strip=True) if question_el else None
-
-        options = [opt.get_text(strip=True) for opt in q_div.select('.q_option')]
-
-        answer_el = q_div.select_one('.ans_label')
-        answer = answer_el.get_text(strip=True) if answer_el else None
-
-        page_questions.append({
-            'question': question_text,
-            'options': options,
-            'answer': answer
-        })
-
-    if not page_questions:
-        print(f"Questions found: 0 (stopping)")
-        break
-    print(f"Questions found: {len(page_questions)}")
-    questions.extend(page_questions)
+questions = scrape_past_questions('biology', 2019, MAX_PAGES)
+print(f"Questions found: {len(questions)}")
 
 # Print the results
 for q in questions:
@@ -84,21 +45,10 @@ exam, _ = Exam.objects.get_or_create(
     }
 )
 
-for idx, q in enumerate(questions, start=1):
-    question_obj = Question.objects.create(
-        exam=exam,
-        question_text=q['question'],
-        question_type='multiple_choice',  # or as appropriate
-        marks=1,  # or as appropriate
-        order=idx
-    )
-    for opt in q['options']:
-        is_correct = (opt == q['answer'])
-        Choice.objects.create(
-            question=question_obj,
-            choice_text=opt,
-            is_correct=is_correct
-        )
+ingested = ingest_questions(exam, [
+    scraped_question_row(q, order) for order, q in enumerate(questions, start=1)
+])
+print(f"Questions created: {ingested['created']}, updated: {ingested['updated']}, skipped: {ingested['skipped']}")
 
 timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 csv_filename = f'scraped_questions_{timestamp}.csv'
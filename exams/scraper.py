@@ -0,0 +1,205 @@
+"""
+Past-question page fetching and parsing.
+
+PageFetcher shares one requests.Session (a pooled keep-alive connection per
+host) across a bounded thread pool. Requests to the same host are spaced by a
+minimum interval, transient failures (connection errors, 429 and 5xx) are
+retried with exponential backoff, and pages can be cached on disk under a
+hash of their URL so a scrape can be re-parsed offline.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = 'https://nigerianscholars.com'
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def past_questions_url(slug, year, page=1, base_url=BASE_URL):
+    url = f'{base_url}/past-questions/{slug}/jamb/year/{year}/'
+    if page > 1:
+        url = f'{url}page/{page}/'
+    return url
+
+
+def parse_question_page(html):
+    """Return the {'question', 'options', 'answer'} dicts found in ``html``."""
+    soup = BeautifulSoup(html, 'html.parser')
+    questions = []
+    for q_div in soup.select('.question_block'):
+        question_el = q_div.select_one('.question_text')
+        answer_el = q_div.select_one('.ans_label')
+        questions.append({
+            'question': question_el.get_text(strip=True) if question_el else None,
+            'options': [opt.get_text(strip=True) for opt in q_div.select('.q_option')],
+            'answer': answer_el.get_text(strip=True) if answer_el else None,
+        })
+    return questions
+
+
+class HostRateLimiter:
+    """Hands out request slots at least ``interval`` seconds apart per host."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PageFetcher:
+    def __init__(self, max_workers=None, rate_limit=None, retries=3, backoff=0.5,
+                 timeout=15, cache_dir=None):
+        self.max_workers = max_workers or settings.SCRAPER_MAX_WORKERS
+        if rate_limit is None:
+            rate_limit = settings.SCRAPER_RATE_LIMIT
+        self.rate_limiter = HostRateLimiter(1 / rate_limit if rate_limit else 0)
+        self.timeout = timeout
+        self.cache_dir = cache_dir if cache_dir is not None else settings.SCRAPER_CACHE_DIR
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=('GET',),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers,
+                              max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def cache_path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.html')
+
+    def fetch(self, url):
+        """Return the page body, or None when the page does not exist."""
+        if self.cache_dir:
+            path = self.cache_path(url)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as cached:
+                    return cached.read()
+
+        self.rate_limiter.wait(urlsplit(url).netloc)
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename so a crashed scrape never leaves half a page behind
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as cached:
+                cached.write(response.text)
+            os.replace(tmp_path, path)
+        return response.text
+
+    def fetch_many(self, urls, on_progress=None):
+        """
+        Fetch ``urls`` concurrently; returns their bodies in the same order.
+        ``on_progress(done, total)`` is called from the calling thread as
+        pages arrive, so it may safely touch the database.
+        """
+        urls = list(urls)
+        bodies = []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls) or 1)) as executor:
+            for body in executor.map(self.fetch, urls):
+                bodies.append(body)
+                if on_progress:
+                    on_progress(len(bodies), len(urls))
+        return bodies
+
+    def scrape_papers(self, papers, max_pages, base_url=BASE_URL, on_progress=None):
+        """
+        Scrape the pages of each (slug, year) in ``papers``. Returns
+        {(slug, year): [question dicts]}, each paper's pages read in order up
+        to the first missing or empty one.
+
+        Pages are fetched concurrently in rounds that share ``max_workers``
+        between the papers still going, and a paper stops being requested
+        after the round that found its last page, rather than every paper
+        being fetched all the way to ``max_pages``.
+        """
+        results = {paper: [] for paper in papers}
+        next_page = dict.fromkeys(results, 1)
+        fetched = 0
+
+        def progress(done, _):
+            on_progress(fetched + done, total)
+
+        while next_page:
+            # Pages fetched so far plus the most still to come; shrinks to
+            # the pages actually fetched as papers run out early
+            total = fetched + sum(max_pages - first + 1 for first in next_page.values())
+            step = max(self.max_workers // len(next_page), 1)
+            batch = [
+                (paper, page)
+                for paper, first in next_page.items()
+                for page in range(first, min(first + step, max_pages + 1))
+            ]
+            pages = self.fetch_many(
+                [past_questions_url(slug, year, page, base_url) for (slug, year), page in batch],
+                progress if on_progress else None,
+            )
+            fetched += len(batch)
+
+            finished = set()
+            for ((paper, page), html) in zip(batch, pages):
+                if paper in finished:
+                    continue
+                page_questions = parse_question_page(html) if html else []
+                if not page_questions:
+                    finished.add(paper)
+                    continue
+                results[paper].extend(page_questions)
+                if page == max_pages:
+                    finished.add(paper)
+            next_page = {
+                paper: first + step for paper, first in next_page.items() if paper not in finished
+            }
+        if on_progress:
+            on_progress(fetched, fetched)
+        return results
+
+
+def scrape_past_questions(slug, year, max_pages, on_progress=None, base_url=BASE_URL, **fetcher_options):
+    with PageFetcher(**fetcher_options) as fetcher:
+        return fetcher.scrape_papers(
+            [(slug, year)], max_pages, base_url=base_url, on_progress=on_progress
+        )[(slug, year)]
@@ -1,7 +1,10 @@
 from rest_framework import serializers
 
 from courses.subjects.serializers import SubjectSerializer
-from .models import Exam, Question, Choice, ExamAttempt, Answer
+from .models import Exam, Question, Choice, ExamAttempt, Answer, ScrapeJob
+from .answer_keys import get_answer_key, touch_exam
+from .importer import IMPORT_FORMATS
+from .grading import grade_submission
 from courses.serializers import CourseSerializer
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -26,8 +29,9 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         choices_data = validated_data.pop('choices')
         question = Question.objects.create(**validated_data)
-        for choice_data in choices_data:
-            Choice.objects.create(question=question, **choice_data)
+        Choice.objects.bulk_create([Choice(question=question, **choice_data) for choice_data in choices_data])
+        # bulk_create skips the Choice signals that version the answer key
+        touch_exam(question.exam_id)
         return question
 
 class ExamSerializer(serializers.ModelSerializer):
@@ -38,6 +42,24 @@ class ExamSerializer(serializers.ModelSerializer):
         model = Exam
         fields = '__all__'
 
+class ExamSummarySerializer(serializers.ModelSerializer):
+    # List representation without the question tree; questions are served by
+    # the questions endpoint and the exam detail views.
+    subject = SubjectSerializer(read_only=True)
+    question_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Exam
+        fields = ('id', 'subject', 'title', 'description', 'duration', 'total_marks',
+                 'examination_type', 'year', 'passing_marks', 'start_time', 'end_time',
+                 'is_published', 'created_at', 'updated_at', 'question_count')
+
+    def get_question_count(self, obj):
+        # Annotated by Exam.objects.with_question_count(); fall back for bare instances
+        if hasattr(obj, 'question_count'):
+            return obj.question_count
+        return obj.questions.count()
+
 class ExamCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Exam
@@ -53,7 +75,8 @@ class StaffExamCreateSerializer(serializers.ModelSerializer):
 class AnswerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Answer
-        fields = ('question', 'answer_text')
+        fields = ('question', 'answer_text', 'selected_choice', 'marks_obtained')
+        read_only_fields = ('selected_choice', 'marks_obtained')
 
 class ExamAttemptSerializer(serializers.ModelSerializer):
     exam = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -65,25 +88,66 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
                  'is_completed', 'answers')
         read_only_fields = ('student', 'score', 'is_completed')
 
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    # Ranks are looked up in context['ranks'], see ExamLeaderboardView
+    rank = serializers.SerializerMethodField()
+    student_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExamAttempt
+        fields = ('id', 'rank', 'student', 'student_name', 'score', 'end_time')
+
+    def get_rank(self, obj):
+        return self.context.get('ranks', {}).get(obj.score)
+
+    def get_student_name(self, obj):
+        return obj.student.get_full_name() or obj.student.username
+
+class SubmittedAnswerSerializer(serializers.Serializer):
+    # Plain ids so a 100-question paper isn't validated with 100 lookups;
+    # ExamSubmissionSerializer checks them against the answer key instead.
+    question = serializers.IntegerField()
+    answer_text = serializers.CharField(allow_blank=True)
+
 class ExamSubmissionSerializer(serializers.Serializer):
-    answers = AnswerSerializer(many=True)
+    answers = SubmittedAnswerSerializer(many=True)
     
     def validate(self, data):
         attempt = self.context['attempt']
-        exam = attempt.exam
-        
-        # Validate that all questions are answered
-        answered_questions = set(answer['question'].id for answer in data['answers'])
-        exam_questions = set(question.id for question in exam.questions.all())
+        answer_key = get_answer_key(attempt.exam)
         
-        if answered_questions != exam_questions:
+        # Validate that all questions are answered, once each
+        answered_questions = [answer['question'] for answer in data['answers']]
+        if len(answered_questions) != len(set(answered_questions)):
+            raise serializers.ValidationError("Each question can only be answered once.")
+        if set(answered_questions) != set(answer_key.question_ids):
             raise serializers.ValidationError("All questions must be answered.")
         
         return data
+
+    def create(self, validated_data):
+        return grade_submission(self.context['attempt'], validated_data['answers'])
     
 
 class ScrapeQuestionsSerializer(serializers.Serializer):
-    subject = serializers.CharField()
+    subject = serializers.CharField(max_length=100)
     year = serializers.IntegerField()
-    pages = serializers.IntegerField()
-    slug = serializers.CharField()
+    pages = serializers.IntegerField(min_value=1)
+    slug = serializers.SlugField(max_length=100)
+
+
+class QuestionImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False,
+                                          help_text="Defaults to the file extension, else csv")
+    exam = serializers.PrimaryKeyRelatedField(queryset=Exam.objects.all(), required=False,
+                                              help_text="Import every row into this exam")
+    update_existing = serializers.BooleanField(default=True)
+
+
+class ScrapeJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ScrapeJob
+        fields = ['id', 'subject_name', 'slug', 'year', 'pages', 'status', 'pages_fetched',
+                  'exam', 'result', 'error', 'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
@@ -0,0 +1,90 @@
+import functools
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from elearning.signals import deleted_via
+from .analytics import rebuild_exam_analytics, record_graded_attempt
+from .answer_keys import touch_exam
+from .leaderboard import rebuild_type_analytics, record_type_attempt
+from .models import Choice, Exam, ExamAnalytics, Question
+
+# Sent inside the grading transaction once an ExamAttempt has been scored
+# and its Answer rows written. Receivers get `attempt`.
+attempt_graded = Signal()
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, **kwargs):
+    touch_exam(instance.exam_id)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, origin=None, **kwargs):
+    # Nothing to version when the exam itself is being deleted
+    if not deleted_via(origin, Exam):
+        touch_exam(instance.exam_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def choice_changed(sender, instance, origin=None, **kwargs):
+    # A cascade from a question or exam delete is covered by the handler above
+    if origin is not None and deleted_via(origin, Question, Exam):
+        return
+    Exam.objects.filter(questions__id=instance.question_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Exam)
+def exam_created(sender, instance, created, raw=False, **kwargs):
+    # An empty row for new exams, so grading only ever adds to it
+    if created and not raw:
+        ExamAnalytics.objects.get_or_create(exam=instance)
+
+
+@receiver(attempt_graded)
+def update_exam_analytics(sender, attempt, **kwargs):
+    # In the grading transaction, like the learning stats: a rebuild then
+    # either sees the attempt already folded in or waits for it, never both
+    record_graded_attempt(attempt)
+
+
+@receiver(attempt_graded)
+def update_type_analytics(sender, attempt, **kwargs):
+    record_type_attempt(attempt)
+
+
+def rebuild_type_analytics_on_commit(*examination_type_ids):
+    for examination_type_id in set(examination_type_ids) - {None}:
+        transaction.on_commit(
+            functools.partial(rebuild_type_analytics, examination_type_id), robust=True
+        )
+
+
+@receiver(pre_save, sender=Exam)
+def remember_exam_grading(sender, instance, **kwargs):
+    # Moving a paper to another examination type or changing its total marks
+    # reshuffles the percent histograms it counts towards, and its passing
+    # marks decide which attempts passed; see exam_regraded
+    instance._previous_grading = Exam.objects.filter(pk=instance.pk).values_list(
+        'examination_type_id', 'total_marks', 'passing_marks'
+    ).first() if instance.pk is not None else None
+
+
+@receiver(post_save, sender=Exam)
+def exam_regraded(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_grading', None)
+    if previous is None:
+        return
+    examination_type_id, total_marks, passing_marks = previous
+    if (examination_type_id, total_marks) != (instance.examination_type_id, instance.total_marks):
+        rebuild_type_analytics_on_commit(examination_type_id, instance.examination_type_id)
+    if passing_marks != instance.passing_marks:
+        transaction.on_commit(functools.partial(rebuild_exam_analytics, instance), robust=True)
+
+
+@receiver(post_delete, sender=Exam)
+def exam_deleted(sender, instance, **kwargs):
+    rebuild_type_analytics_on_commit(instance.examination_type_id)
@@ -1,3 +1,570 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+import requests
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APIClient
+from tablib import Dataset
+
+from courses.subjects.models import Subject
+from progress.models import ActivityEvent, ExamProgress, LearningStats
+from users.models import ExaminationType
+from .admin import AnswerResource, ExamAttemptResource
+from .analytics import rebuild_exam_analytics
+from .grading import grade_submission
+from .importer import import_questions
+from .jobs import claim_next_job, run_scrape_job
+from .leaderboard import rebuild_type_analytics
+from .models import Answer, Choice, Exam, ExamAnalytics, ExamAttempt, ExaminationTypeAnalytics, Question, ScrapeJob
+from .scraper import PageFetcher, past_questions_url, scrape_past_questions
+
+User = get_user_model()
+
+
+class ExamFixtureMixin:
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username='student', password='x', user_type='student')
+        subject, _ = Subject.objects.get_or_create(name='Mathematics')
+        self.exam = Exam.objects.create(
+            subject=subject, title='Mock paper', description='Mock paper', duration=timezone.timedelta(hours=1),
+            total_marks=4, passing_marks=2, year=2024, start_time=timezone.now(),
+            end_time=timezone.now() + timezone.timedelta(hours=1), is_published=True,
+        )
+        self.q1 = self.question('What is 2 + 2?', 2, [('Three', False), ('Four', True)])
+        self.q2 = self.question('Pick the prime', 1, [('Nine', False), ('Seven', True)])
+        self.q3 = self.question('Is zero even?', 1, [('True', True), ('False', False)], 'true_false')
+        self.essay = self.question('Explain why.', 0, [], 'essay')
+
+    def question(self, text, marks, choices, question_type='multiple_choice'):
+        question = Question.objects.create(
+            exam=self.exam, question_text=text, question_type=question_type, marks=marks,
+            order=self.exam.questions.count() + 1,
+        )
+        for choice_text, is_correct in choices:
+            Choice.objects.create(question=question, choice_text=choice_text, is_correct=is_correct)
+        return question
+
+    def choice(self, question, text):
+        return question.choices.get(choice_text=text)
+
+    def start_attempt(self):
+        self.exam.refresh_from_db()
+        return ExamAttempt.objects.select_related('exam').get(
+            pk=ExamAttempt.objects.create(exam=self.exam, student=self.student).pk
+        )
+
+    def answers(self, **texts):
+        return [
+            {'question': question.pk, 'answer_text': texts.get(name, '')}
+            for name, question in (('q1', self.q1), ('q2', self.q2), ('q3', self.q3), ('essay', self.essay))
+        ]
+
+
+class GradingTests(ExamFixtureMixin, TestCase):
+    def test_scores_correct_choices_by_marks(self):
+        attempt = grade_submission(self.start_attempt(), self.answers(
+            q1=str(self.choice(self.q1, 'Four').pk), q2='Nine', q3='True', essay='Because.',
+        ))
+
+        self.assertEqual(attempt.score, 3)
+        self.assertTrue(attempt.is_completed)
+        self.assertIsNotNone(attempt.end_time)
+        stored = ExamAttempt.objects.get(pk=attempt.pk)
+        self.assertEqual((stored.score, stored.is_completed), (3, True))
+        marks = dict(Answer.objects.filter(attempt=attempt).values_list('question_id', 'marks_obtained'))
+        self.assertEqual(marks, {self.q1.pk: 2, self.q2.pk: 0, self.q3.pk: 1, self.essay.pk: None})
+
+    def test_resolves_selected_choice_by_id_or_text(self):
+        attempt = grade_submission(self.start_attempt(), self.answers(
+            q1=str(self.choice(self.q1, 'Four').pk), q2='  seVEN ', q3='Maybe',
+        ))
+
+        selected = dict(Answer.objects.filter(attempt=attempt).values_list('question_id', 'selected_choice_id'))
+        self.assertEqual(selected[self.q1.pk], self.choice(self.q1, 'Four').pk)
+        # Case and spacing are ignored when matching choice text
+        self.assertEqual(selected[self.q2.pk], self.choice(self.q2, 'Seven').pk)
+        # Unknown answers and questions without choices select nothing
+        self.assertIsNone(selected[self.q3.pk])
+        self.assertIsNone(selected[self.essay.pk])
+        self.assertEqual(attempt.score, 3)
+
+    def test_choice_id_from_another_question_is_read_as_text(self):
+        attempt = grade_submission(self.start_attempt(), self.answers(q1=str(self.choice(self.q2, 'Seven').pk)))
+
+        answer = Answer.objects.get(attempt=attempt, question=self.q1)
+        self.assertIsNone(answer.selected_choice_id)
+        self.assertEqual(answer.marks_obtained, 0)
+
+    def test_rejects_second_submission(self):
+        attempt = self.start_attempt()
+        grade_submission(attempt, self.answers(q1='Four'))
+
+        stale = ExamAttempt.objects.select_related('exam').get(pk=attempt.pk)
+        stale.is_completed = False
+        with self.assertRaises(PermissionDenied):
+            grade_submission(stale, self.answers(q1='Four', q2='Seven', q3='True'))
+        self.assertEqual(ExamAttempt.objects.get(pk=attempt.pk).score, 2)
+        self.assertEqual(Answer.objects.filter(attempt=attempt).count(), 4)
+
+    def test_submit_endpoint_returns_403_when_already_completed(self):
+        attempt = self.start_attempt()
+        client = APIClient()
+        client.force_authenticate(self.student)
+        url = f'/api/exams/attempts/{attempt.pk}/submit/'
+
+        response = client.post(url, {'answers': self.answers(q1='Four', q2='Seven')}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['score'], 3)
+
+        response = client.post(url, {'answers': self.answers(q1='Four', q2='Seven', q3='True')}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(ExamAttempt.objects.get(pk=attempt.pk).score, 3)
+
+    def test_grading_updates_progress_stats_and_analytics(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = grade_submission(self.start_attempt(), self.answers(q1='Four'))
+        with self.captureOnCommitCallbacks(execute=True):
+            second = grade_submission(self.start_attempt(), self.answers(q1='Four', q2='Seven', q3='True'))
+
+        progress = ExamProgress.objects.get(student=self.student, exam=self.exam)
+        self.assertEqual(progress.best_score, 4)
+        self.assertEqual(progress.last_attempt_id, second.pk)
+        self.assertEqual(progress.attempts.count(), 2)
+
+        events = ActivityEvent.objects.filter(student=self.student, event_type='exam_submitted')
+        self.assertEqual(sorted(events.values_list('attempt_id', 'score')), [(first.pk, 2), (second.pk, 4)])
+
+        stats = LearningStats.objects.get(pk=self.student.pk)
+        self.assertEqual((stats.total_exams, stats.scored_exams, stats.exam_score_total), (1, 1, 4))
+
+        analytics = ExamAnalytics.objects.get(pk=self.exam.pk)
+        self.assertEqual((analytics.attempts, analytics.passed, analytics.score_sum), (2, 2, 6))
+        self.assertEqual(analytics.score_counts, {'2': 1, '4': 1})
+        self.assertEqual(analytics.question_stats[str(self.q2.pk)]['correct'], 1)
+
+
+class QuestionListTests(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/exams/{self.exam.pk}/questions/'
+
+    def test_lists_choices_in_a_fixed_number_of_queries(self):
+        for params, queries in (({}, 3), ({'cursor': ''}, 2)):
+            with self.assertNumQueries(queries):
+                response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([len(question['choices']) for question in response.data['results']], [2, 2, 2, 0])
+
+        for n in range(5):
+            self.question(f'Extra {n}', 1, [('Yes', True), ('No', False), ('Maybe', False)])
+        for params, queries in (({}, 3), ({'cursor': ''}, 2)):
+            with self.assertNumQueries(queries):
+                response = self.client.get(self.url, params)
+            self.assertEqual(len(response.data['results']), 9)
+
+
+class DeletingExamAttemptResource(ExamAttemptResource):
+    def for_delete(self, row, instance):
+        return row.get('delete') == '1'
+
+
+class AnalyticsTests(ExamFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.waec, _ = ExaminationType.objects.get_or_create(name='WAEC')
+        self.jamb, _ = ExaminationType.objects.get_or_create(name='JAMB')
+        self.exam.examination_type = self.waec
+        self.exam.save()
+
+    def grade(self, **texts):
+        return grade_submission(self.start_attempt(), self.answers(**texts))
+
+    def totals(self):
+        analytics = ExamAnalytics.objects.get(pk=self.exam.pk)
+        return analytics.attempts, analytics.passed, analytics.score_sum, analytics.score_counts
+
+    def type_counts(self, examination_type):
+        analytics = ExaminationTypeAnalytics.objects.filter(pk=examination_type.pk).first()
+        return analytics and (analytics.attempts, analytics.percent_counts)
+
+    def test_graded_attempts_are_folded_in_once(self):
+        # Folded in by the grading transaction itself, not after it commits
+        self.grade(q1='Four')
+        self.grade(q1='Four', q2='Seven', q3='True')
+        self.assertEqual(self.totals(), (2, 2, 6, {'2': 1, '4': 1}))
+        self.assertEqual(self.type_counts(self.waec), (2, {'50': 1, '100': 1}))
+
+        rebuild_exam_analytics(self.exam)
+        rebuild_type_analytics(self.waec.pk)
+        self.assertEqual(self.totals(), (2, 2, 6, {'2': 1, '4': 1}))
+        self.assertEqual(self.type_counts(self.waec), (2, {'50': 1, '100': 1}))
+
+    def test_exam_edits_rebuild_type_histograms_without_double_counting(self):
+        self.grade(q1='Four')
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.exam.title = 'Mock paper (revised)'
+            self.exam.save()
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.examination_type = self.jamb
+            self.exam.save()
+        self.grade(q1='Four', q2='Seven')
+        self.assertEqual(self.type_counts(self.waec), (0, {}))
+        self.assertEqual(self.type_counts(self.jamb), (2, {'50': 1, '75': 1}))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.total_marks = 8
+            self.exam.save()
+        self.assertEqual(self.type_counts(self.jamb), (2, {'25': 1, '37': 1}))
+        self.assertEqual(self.totals(), (2, 2, 5, {'2': 1, '3': 1}))
+
+    def test_passing_marks_change_rebuilds_exam_analytics(self):
+        stale = self.start_attempt()
+        self.grade(q1='Four')
+        self.grade(q1='Four', q2='Seven', q3='True')
+        self.assertEqual(self.totals()[:2], (2, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam.passing_marks = 3
+            self.exam.save()
+        self.assertEqual(self.totals()[:2], (2, 1))
+
+        # An attempt loaded before the change is judged by the new passing marks
+        self.assertEqual(stale.exam.passing_marks, 2)
+        grade_submission(stale, self.answers(q1='Four'))
+        self.assertEqual(self.totals()[:2], (3, 1))
+        self.assertEqual(rebuild_exam_analytics(self.exam).passed, 1)
+
+
+    def import_rows(self, resource, headers, *rows):
+        result = resource.import_data(Dataset(*rows, headers=headers), raise_errors=True)
+        self.assertFalse(result.has_errors())
+
+    def test_attempt_and_answer_imports_rebuild_analytics(self):
+        self.grade(q1='Four')
+        end_time = timezone.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.import_rows(
+            ExamAttemptResource(), ['id', 'exam', 'student', 'end_time', 'score', 'is_completed'],
+            ['', self.exam.pk, self.student.pk, end_time, 4, 1],
+            ['', self.exam.pk, self.student.pk, end_time, 1, 1],
+            ['', self.exam.pk, self.student.pk, '', '', 0],
+        )
+        self.assertEqual(self.totals(), (3, 2, 7, {'1': 1, '2': 1, '4': 1}))
+        self.assertEqual(self.type_counts(self.waec), (3, {'25': 1, '50': 1, '100': 1}))
+
+        imported = ExamAttempt.objects.get(exam=self.exam, score=4)
+        self.import_rows(
+            AnswerResource(), ['id', 'attempt', 'question', 'answer_text', 'marks_obtained'],
+            ['', imported.pk, self.q2.pk, 'Seven', 1],
+        )
+        analytics = ExamAnalytics.objects.get(pk=self.exam.pk)
+        self.assertEqual(analytics.question_stats[str(self.q2.pk)]['correct'], 1)
+
+        self.import_rows(
+            DeletingExamAttemptResource(), ['id', 'exam', 'student', 'score', 'is_completed', 'delete'],
+            [imported.pk, self.exam.pk, self.student.pk, 4, 1, '1'],
+        )
+        self.assertEqual(self.totals(), (2, 1, 3, {'1': 1, '2': 1}))
+        self.assertEqual(self.type_counts(self.waec), (2, {'25': 1, '50': 1}))
+
+
+class QuestionImportTests(TestCase):
+    def setUp(self):
+        self.subject, _ = Subject.objects.get_or_create(name='Mathematics')
+
+    def record(self, question_text='What is 2 + 2?', **fields):
+        return {
+            'exam_title': 'Mock paper', 'subject': 'Mathematics', 'examination_type': 'WAEC', 'year': 2024,
+            'question_text': question_text, 'question_type': 'multiple_choice', 'marks': 1,
+            'choices': [{'choice_text': 'Three', 'is_correct': False}, {'choice_text': 'Four', 'is_correct': True}],
+            **fields,
+        }
+
+    def lines(self, *records):
+        return [record if isinstance(record, str) else json.dumps(record) for record in records]
+
+    def test_imports_records_into_the_named_exam(self):
+        report = import_questions(self.lines(self.record(), self.record('Pick the prime')), 'jsonl')
+
+        self.assertEqual((report['rows'], report['created'], report['invalid']), (2, 2, 0))
+        exam = Exam.objects.get(title='Mock paper', subject=self.subject, year=2024)
+        self.assertEqual(exam.examination_type.name, 'WAEC')
+        question = exam.questions.get(question_text='What is 2 + 2?')
+        self.assertEqual(list(question.choices.filter(is_correct=True).values_list('choice_text', flat=True)), ['Four'])
+
+    def test_rejects_malformed_records_and_keeps_going(self):
+        report = import_questions(self.lines(
+            '{"question_text": ',
+            '["not", "an", "object"]',
+            self.record(''),
+            self.record(question_type='matching'),
+            self.record(choices='Four'),
+            self.record(choices=[{'choice_text': 'Four', 'is_correct': False}]),
+            self.record(marks='two'),
+            self.record(year=-1),
+            self.record('Pick the prime'),
+        ), 'jsonl')
+
+        self.assertEqual((report['rows'], report['created'], report['invalid']), (9, 1, 8))
+        self.assertEqual([error['record'] for error in report['errors']], list(range(1, 9)))
+        self.assertTrue(report['errors'][0]['error'].startswith('Invalid JSON'))
+
+    def test_rejects_wrongly_typed_fields(self):
+        report = import_questions(self.lines(
+            self.record(42),
+            self.record(exam_title=['Mock paper']),
+            self.record(subject={'name': 'Mathematics'}),
+            self.record(examination_type=7),
+            self.record(question_type=['multiple_choice']),
+            self.record(choices=[{'choice_text': 4, 'is_correct': True}]),
+            self.record(choices=['Four']),
+            self.record(marks=[1]),
+            self.record(exam_title='x' * 201),
+        ), 'jsonl')
+
+        self.assertEqual((report['rows'], report['created'], report['invalid']), (9, 0, 9))
+        self.assertEqual([error['error'] for error in report['errors'][:5]], [
+            'question_text must be a string',
+            'exam_title must be a string',
+            'subject must be a string',
+            'examination_type must be a string',
+            'question_type must be a string',
+        ])
+        self.assertFalse(Exam.objects.filter(title='Mock paper').exists())
+
+    def test_duplicate_records_are_imported_once(self):
+        report = import_questions(self.lines(
+            self.record(), self.record('  what is 2 + 2? '), self.record('Pick the prime'),
+        ), 'jsonl')
+        self.assertEqual((report['created'], report['skipped']), (2, 1))
+
+        report = import_questions(self.lines(
+            self.record(), self.record('Pick the prime', marks=2),
+        ), 'jsonl')
+        self.assertEqual((report['created'], report['updated'], report['skipped']), (0, 1, 1))
+        self.assertEqual(Question.objects.filter(exam__title='Mock paper').count(), 2)
+
+    def test_csv_correct_option(self):
+        report = import_questions([
+            'exam_title,subject,year,question_text,option_1,option_2,option_3,correct_option\n',
+            'Mock paper,Mathematics,2024,Pick the primes,Seven,Nine,Two,"[""Seven"", ""Two""]"\n',
+            'Mock paper,Mathematics,2024,Pick one,a|b,c,d,a|b\n',
+            'Mock paper,Mathematics,2024,Legacy export,Seven,Nine,Two,Seven|Two\n',
+        ])
+
+        self.assertEqual((report['created'], report['invalid']), (3, 0))
+        correct = {
+            question.question_text: sorted(choice.choice_text for choice in question.choices.all() if choice.is_correct)
+            for question in Question.objects.filter(exam__title='Mock paper').prefetch_related('choices')
+        }
+        self.assertEqual(correct, {
+            'Pick the primes': ['Seven', 'Two'], 'Pick one': ['a|b'], 'Legacy export': ['Seven', 'Two'],
+        })
+
+    def test_command_reports_invalid_records(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as source:
+            source.write('\n'.join(self.lines(self.record(), self.record(question_type=['essay']))))
+        self.addCleanup(os.remove, source.name)
+
+        with open(os.devnull, 'w') as devnull:
+            call_command('import_questions', source.name, stdout=devnull, stderr=devnull)
+        self.assertEqual(Question.objects.filter(exam__title='Mock paper').count(), 1)
+
+    def test_import_endpoint_reports_invalid_records(self):
+        teacher = User.objects.create_user(username='teacher', password='x', user_type='teacher')
+        client = APIClient()
+        client.force_authenticate(teacher)
+        upload = SimpleUploadedFile('bank.jsonl', '\n'.join(
+            self.lines(self.record(), self.record(choices=[{'choice_text': 4, 'is_correct': True}]))
+        ).encode())
+
+        response = client.post('/api/exams/import/', {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['invalid']), (1, 1))
+        self.assertEqual(response.data['errors'], [
+            {'record': 2, 'error': 'choices must be a list of objects with a choice_text string'},
+        ])
+
+
+def question_page(*questions):
+    return ''.join(
+        f'<div class="question_block"><div class="question_text">{question}</div>'
+        '<span class="q_option">Yes</span><span class="q_option">No</span>'
+        '<span class="ans_label">Yes</span></div>'
+        for question in questions
+    )
+
+
+class PastQuestionsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, time.monotonic()))
+            responses = server.routes.get(self.path, [])
+            status, body = responses.pop(0) if len(responses) > 1 else (responses or [(404, '')])[0]
+        body = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalSiteMixin:
+    """Serves past-question pages from a local HTTP server for the test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), PastQuestionsHandler)
+        cls.server.lock = threading.Lock()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.server.routes = {}
+        self.server.requests = []
+
+    def route(self, page, *responses, slug='mathematics', year=2020):
+        """Serve ``responses`` ((status, body) pairs) in turn for a page; the last one repeats."""
+        path = past_questions_url(slug, year, page, '')
+        self.server.routes[path] = list(responses)
+        return self.base_url + path
+
+
+class ScraperTests(LocalSiteMixin, SimpleTestCase):
+    def requested_urls(self):
+        return sorted(self.base_url + path for path, at in self.server.requests)
+
+    def fetcher(self, **options):
+        options = {'max_workers': 4, 'rate_limit': 0, 'backoff': 0, 'cache_dir': '', **options}
+        return PageFetcher(**options)
+
+    def test_retries_transient_errors_with_backoff(self):
+        url = self.route(1, (503, ''), (502, ''), (200, question_page('Q1')))
+
+        with self.fetcher(backoff=0.1) as fetcher:
+            started = time.monotonic()
+            self.assertEqual(fetcher.fetch(url), question_page('Q1'))
+        # No wait before the first retry, then backoff * 2
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_gives_up_after_the_retries(self):
+        url = self.route(1, (500, ''))
+
+        with self.fetcher(retries=2) as fetcher, self.assertRaises(requests.RequestException):
+            fetcher.fetch(url)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_missing_page_is_none(self):
+        with self.fetcher() as fetcher:
+            self.assertIsNone(fetcher.fetch(self.route(1)))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_stops_at_first_missing_page(self):
+        self.route(1, (200, question_page('Q1', 'Q2')))
+        self.route(2, (200, question_page('Q3')))
+        self.route(4, (200, question_page('Q4')))
+        progress = []
+
+        questions = scrape_past_questions(
+            'mathematics', 2020, 50, on_progress=lambda *args: progress.append(args),
+            base_url=self.base_url, max_workers=1, rate_limit=0, cache_dir='',
+        )
+
+        self.assertEqual([question['question'] for question in questions], ['Q1', 'Q2', 'Q3'])
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(progress, [(1, 50), (2, 50), (3, 50), (3, 3)])
+
+    def test_stops_at_first_empty_page(self):
+        self.route(1, (200, question_page('Q1')))
+        self.route(2, (200, '<html><body>No questions</body></html>'))
+        self.route(3, (200, question_page('Q3')))
+        progress = []
+
+        with self.fetcher(max_workers=2) as fetcher:
+            results = fetcher.scrape_papers(
+                [('mathematics', 2020)], 10, base_url=self.base_url,
+                on_progress=lambda *args: progress.append(args),
+            )
+
+        self.assertEqual([question['question'] for question in results[('mathematics', 2020)]], ['Q1'])
+        # One round of max_workers pages, then no more
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(progress[-1], (2, 2))
+
+    def test_caches_pages_on_disk(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        url = self.route(1, (200, question_page('Q1')))
+        missing = self.route(2)
+
+        with self.fetcher(cache_dir=cache_dir) as fetcher:
+            self.assertEqual(fetcher.fetch(url), question_page('Q1'))
+            self.assertIsNone(fetcher.fetch(missing))
+        with self.fetcher(cache_dir=cache_dir) as fetcher:
+            self.assertEqual(fetcher.fetch(url), question_page('Q1'))
+            self.assertIsNone(fetcher.fetch(missing))
+
+        # Served from the cache the second time; missing pages are not cached
+        self.assertEqual(self.requested_urls(), sorted([url, missing, missing]))
+        self.assertEqual(os.listdir(cache_dir), [os.path.basename(fetcher.cache_path(url))])
+
+    def test_rate_limits_requests_per_host(self):
+        urls = [self.route(page, (200, question_page(f'Q{page}'))) for page in range(1, 6)]
+
+        with self.fetcher(max_workers=5, rate_limit=20) as fetcher:
+            fetcher.fetch_many(urls)
+
+        times = sorted(at for path, at in self.server.requests)
+        self.assertEqual(len(times), 5)
+        # Slots are handed out 0.05s apart, whichever thread takes them
+        self.assertGreaterEqual(times[-1] - times[0], 0.15)
+
+
+@override_settings(SCRAPER_MAX_WORKERS=2, SCRAPER_RATE_LIMIT=0, SCRAPER_CACHE_DIR=None)
+class ScrapeJobTests(LocalSiteMixin, TestCase):
+    def test_worker_scrapes_and_ingests_a_job(self):
+        ExaminationType.objects.get_or_create(name='JAMB')
+        self.route(1, (200, question_page('Q1', 'Q2')))
+        self.route(2, (200, question_page('Q3')))
+        ScrapeJob.objects.create(subject_name='Mathematics', slug='mathematics', year=2020, pages=20)
+
+        with override_settings(SCRAPER_BASE_URL=self.base_url):
+            job = run_scrape_job(claim_next_job('worker-1'))
+        self.addCleanup(os.remove, os.path.join('media', job.result['csv_file']))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result['questions_created']), ('completed', 3))
+        self.assertEqual(sorted(job.exam.questions.values_list('question_text', flat=True)), ['Q1', 'Q2', 'Q3'])
+        # Two rounds of two pages, the second ending at the missing page 3
+        self.assertEqual((job.pages_fetched, len(self.server.requests)), (4, 4))
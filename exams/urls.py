@@ -8,10 +8,18 @@ urlpatterns = [
     path('<int:pk>/update/', views.ExamUpdateView.as_view(), name='exam-update'),
     path('<int:pk>/delete/', views.ExamDeleteView.as_view(), name='exam-delete'),
     path('<int:pk>/questions/', views.QuestionListView.as_view(), name='question-list'),
+    path('<int:pk>/export/', views.ExamExportView.as_view(), name='exam-export'),
+    path('export/', views.QuestionBankExportView.as_view(), name='question-bank-export'),
+    path('import/', views.QuestionImportView.as_view(), name='question-bank-import'),
     path('questions/<int:pk>/', views.QuestionDetailView.as_view(), name='question-detail'),
     path('<int:pk>/attempt/', views.ExamAttemptView.as_view(), name='exam-attempt'),
     path('attempts/<int:pk>/', views.ExamAttemptDetailView.as_view(), name='attempt-detail'),
+    path('attempts/<int:pk>/paper/', views.ExamPaperView.as_view(), name='attempt-paper'),
     path('attempts/<int:pk>/submit/', views.ExamSubmissionView.as_view(), name='exam-submit'),
+    path('<int:pk>/leaderboard/', views.ExamLeaderboardView.as_view(), name='exam-leaderboard'),
+    path('<int:pk>/standing/', views.ExamStandingView.as_view(), name='exam-standing'),
+    path('examination-types/<int:pk>/standing/', views.ExaminationTypeStandingView.as_view(),
+         name='examination-type-standing'),
     
     # Staff-specific endpoints
     path('staff/', views.StaffExamListView.as_view(), name='staff-exam-list'),
@@ -24,4 +32,5 @@ urlpatterns = [
     path('staff/questions/<int:pk>/', views.QuestionDetailView.as_view(), name='staff-question-detail'),
 
     path('scrape-questions/', views.ScrapeQuestionsAPIView.as_view(), name='scrape-questions'),
+    path('scrape-jobs/<int:pk>/', views.ScrapeJobDetailView.as_view(), name='scrape-job-detail'),
 ] 
\ No newline at end of file
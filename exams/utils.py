@@ -0,0 +1,13 @@
+import hashlib
+import re
+
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    return WHITESPACE_RE.sub(' ', (text or '').strip()).casefold()
+
+
+def question_text_hash(text):
+    # Identity of a question within an exam, insensitive to case and spacing
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
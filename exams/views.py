@@ -1,36 +1,46 @@
+import codecs
 import datetime
 import csv
 import requests
 from users.models import ExaminationType
 from exams.models import Exam, Question, Choice
 import os
-from bs4 import BeautifulSoup
 from rest_framework import status
+from django.http import HttpResponse
 from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
 from rest_framework import generics, permissions, status, pagination
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.utils import timezone
 from rest_framework.permissions import AllowAny
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from courses.subjects.models import Subject
-from .models import Exam, Question, ExamAttempt, Answer
+from .models import Exam, Question, ExamAttempt, Answer, ScrapeJob
 from .serializers import (
-    ExamSerializer, ExamCreateSerializer,
+    ExamSerializer, ExamSummarySerializer, ExamCreateSerializer,
     QuestionSerializer, QuestionCreateSerializer,
     ExamAttemptSerializer, ExamSubmissionSerializer, ScrapeQuestionsSerializer,
-    StaffExamCreateSerializer
+    ScrapeJobSerializer, StaffExamCreateSerializer, QuestionImportSerializer,
+    LeaderboardEntrySerializer
 )
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from rest_framework.views import APIView
+from rest_framework.parsers import FormParser, MultiPartParser
 from courses.models import Course
-from django.db.models import Avg, Count
+from elearning.pagination import KeysetPagination, KeysetPaginationMixin, StaffPageSizeMixin, is_trusted_client
+from elearning.streaming import streaming_download
+from .analytics import exam_analytics_report, get_exam_analytics
+from .export import EXPORT_FORMATS, export_questions
+from .leaderboard import exam_standing, score_ranks, type_standing
+from .papers import get_paper, render_paper, shuffle_paper
+from .importer import import_questions
 
 # Create your views here.
 
 
-class CustomPagination(pagination.PageNumberPagination):
+class CustomPagination(StaffPageSizeMixin, pagination.PageNumberPagination):
     page_size = 12
     page_size_query_param = 'page_size'
     max_page_size = 12
@@ -41,16 +51,25 @@ class CustomPagination(pagination.PageNumberPagination):
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'num_pages': self.page.paginator.num_pages,
-            'page_size': self.page_size,
+            'page_size': self.page.paginator.per_page,
             'current_page': self.page.number,
             'results': data
         })
 
 
-class ExamListView(generics.ListCreateAPIView):
-    serializer_class = ExamSerializer
+class ExamKeysetPagination(StaffPageSizeMixin, KeysetPagination):
+    ordering = ('-year', '-id')
+
+
+class QuestionKeysetPagination(StaffPageSizeMixin, KeysetPagination):
+    ordering = ('order', 'id')
+
+
+class ExamListView(KeysetPaginationMixin, generics.ListCreateAPIView):
+    serializer_class = ExamSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination  # <-- Add this line
+    keyset_pagination_class = ExamKeysetPagination
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
@@ -61,16 +80,16 @@ class ExamListView(generics.ListCreateAPIView):
             return Exam.objects.none()
         if hasattr(user, 'user_type'):
             if user.user_type == 'teacher':
-                return Exam.objects.all().order_by('-year')  # Order by year descending
+                return Exam.objects.with_question_count().order_by('-year')  # Order by year descending
             elif user.user_type == 'student':
                 # Only exams for courses the student is enrolled in
-                return Exam.objects.filter(examination_type=user.examination_type).order_by('-year')
+                return Exam.objects.with_question_count().filter(examination_type=user.examination_type).order_by('-year')
         return Exam.objects.none()
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ExamCreateSerializer
-        return ExamSerializer
+        return ExamSummarySerializer
 
     def perform_create(self, serializer):
         course = serializer.validated_data['course']
@@ -96,9 +115,9 @@ class ExamDetailView(generics.RetrieveUpdateDestroyAPIView):
 
         user = self.request.user
         if user.user_type == 'teacher':
-            return Exam.objects.all().order_by('-year')
+            return Exam.objects.with_questions().order_by('-year')
         elif user.user_type == 'student':
-            return Exam.objects.filter(examination_type=user.examination_type).order_by('-year')
+            return Exam.objects.with_questions().filter(examination_type=user.examination_type).order_by('-year')
         return Exam.objects.none()
 
 
@@ -134,17 +153,18 @@ class ExamDeleteView(generics.DestroyAPIView):
         return Exam.objects.filter(course__instructor=self.request.user)
 
 
-class QuestionListView(generics.ListCreateAPIView):
+class QuestionListView(KeysetPaginationMixin, generics.ListCreateAPIView):
     serializer_class = QuestionSerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination  # <-- Add this line
+    keyset_pagination_class = QuestionKeysetPagination
 
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return Question.objects.none()
         # Handle both 'pk' and 'exam_id' URL parameters
         exam_id = self.kwargs.get('pk') or self.kwargs.get('exam_id')
-        return Question.objects.filter(exam_id=exam_id)
+        return Question.objects.filter(exam_id=exam_id).prefetch_related('choices')
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -175,7 +195,32 @@ class ExamAttemptView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         exam = Exam.objects.get(id=self.kwargs['pk'])
-        serializer.save(student=self.request.user, exam=exam)  # Pass exam here
+        # Snapshot this attempt's question and choice order
+        paper = get_paper(exam)
+        serializer.save(student=self.request.user, exam=exam,  # Pass exam here
+                        question_order=shuffle_paper(paper), paper_version=paper.version)
+
+
+class ExamPaperView(APIView):
+    """
+    The whole paper for an attempt, without the answers, in the attempt's own
+    question and choice order. Rendered from the cached paper, see exams.papers.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @swagger_auto_schema(responses={200: 'The attempt, its exam and the permuted questions with their choices'})
+    def get(self, request, pk):
+        attempt = get_object_or_404(
+            ExamAttempt.objects.select_related('exam'), pk=pk, student=request.user
+        )
+        paper = get_paper(attempt.exam)
+        if attempt.paper_version != paper.version:
+            # The exam changed since the attempt started; keep the order of
+            # the questions and choices still on it
+            attempt.question_order = shuffle_paper(paper, attempt.question_order)
+            attempt.paper_version = paper.version
+            attempt.save(update_fields=['question_order', 'paper_version'])
+        return HttpResponse(render_paper(paper, attempt), content_type='application/json')
 
 
 class ExamAttemptDetailView(generics.RetrieveAPIView):
@@ -190,24 +235,45 @@ class ExamSubmissionView(generics.CreateAPIView):
     serializer_class = ExamSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_create(self, serializer):
-        attempt = ExamAttempt.objects.get(id=self.kwargs['pk'])
-        if attempt.student != self.request.user:
-            raise permissions.PermissionDenied(
+    def get_attempt(self):
+        if not hasattr(self, '_attempt'):
+            self._attempt = get_object_or_404(
+                ExamAttempt.objects.select_related('exam'), pk=self.kwargs['pk']
+            )
+        return self._attempt
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if not getattr(self, 'swagger_fake_view', False):
+            context['attempt'] = self.get_attempt()
+        return context
+
+    @swagger_auto_schema(responses={201: ExamAttemptSerializer})
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        attempt = self.get_attempt()
+        if attempt.student_id != request.user.id:
+            raise PermissionDenied(
                 "You can only submit your own exam attempts.")
         if attempt.is_completed:
-            raise permissions.PermissionDenied(
+            raise PermissionDenied(
                 "This exam attempt has already been completed.")
-        serializer.save(attempt=attempt)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        attempt = serializer.save()
+        return Response(ExamAttemptSerializer(attempt).data, status=status.HTTP_201_CREATED)
 
 
-class StaffExamListView(generics.ListAPIView):
-    serializer_class = ExamSerializer
+class StaffExamListView(KeysetPaginationMixin, generics.ListAPIView):
+    serializer_class = ExamSummarySerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = CustomPagination  # <-- Add this line
+    keyset_pagination_class = ExamKeysetPagination
 
     def get_queryset(self):
-        return Exam.objects.all().order_by('-year')
+        return Exam.objects.with_question_count().order_by('-year')
 
 
 class StaffExamDetailView(generics.RetrieveAPIView):
@@ -215,7 +281,7 @@ class StaffExamDetailView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        exam = get_object_or_404(Exam, pk=self.kwargs['pk'])
+        exam = get_object_or_404(Exam.objects.with_questions(), pk=self.kwargs['pk'])
         if self.request.user.user_type != 'teacher':
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
         return exam
@@ -269,25 +335,168 @@ class StaffExamAnalyticsView(APIView):
 
     def get(self, request, pk):
         exam = get_object_or_404(Exam, pk=pk)
-        if request.user.user_type != 'teacher' or exam.course.instructor != request.user:
+        # Exams belong to a subject rather than a course, so any teacher may look
+        if request.user.user_type != 'teacher':
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
 
-        attempts = ExamAttempt.objects.filter(exam=exam)
-        total_attempts = attempts.count()
-        completed_attempts = attempts.filter(
-            submitted_at__isnull=False).count()
-        average_score = attempts.filter(submitted_at__isnull=False).aggregate(
-            avg_score=Avg('score')
-        )['avg_score'] or 0
-
+        # Rolled up as attempts are graded, see exams.analytics
+        report = exam_analytics_report(exam, get_exam_analytics(exam))
         return Response({
-            'total_attempts': total_attempts,
-            'completed_attempts': completed_attempts,
-            'average_score': average_score,
-            'passing_rate': (attempts.filter(score__gte=exam.passing_marks).count() / completed_attempts * 100) if completed_attempts > 0 else 0
+            'total_attempts': ExamAttempt.objects.filter(exam=exam).count(),
+            **report,
         })
 
 
+class LeaderboardPagination(KeysetPagination):
+    # Walks the attempt_exam_score_idx index
+    ordering = ('-score', 'end_time', 'id')
+    page_size = 50
+    max_page_size = 100
+
+
+class ExamLeaderboardView(generics.ListAPIView):
+    """An exam's graded attempts, best score first (earliest finish breaks ties)."""
+    serializer_class = LeaderboardEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaderboardPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ExamAttempt.objects.none()
+        self.exam = get_object_or_404(Exam, pk=self.kwargs['pk'])
+        return ExamAttempt.objects.filter(
+            exam=self.exam, is_completed=True, score__isnull=False, end_time__isnull=False
+        ).select_related('student')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if hasattr(self, 'exam'):
+            context['ranks'] = score_ranks(get_exam_analytics(self.exam).score_counts)
+        return context
+
+
+student_parameter = openapi.Parameter(
+    'student',
+    openapi.IN_QUERY,
+    description="Student id (teachers and staff only; defaults to the requesting user)",
+    type=openapi.TYPE_INTEGER,
+)
+
+
+class StandingMixin:
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_student_id(self, request):
+        student_id = request.query_params.get('student')
+        if not student_id:
+            return request.user.id
+        if not is_trusted_client(request.user):
+            raise PermissionDenied("Only teachers and staff can look up other students.")
+        try:
+            return int(student_id)
+        except ValueError:
+            raise ValidationError({'student': 'Expected a student id.'})
+
+    def standing_response(self, standing):
+        if standing is None:
+            return Response({"detail": "No graded attempts yet."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(standing)
+
+
+class ExamStandingView(StandingMixin, APIView):
+    """A student's best score on an exam, with its rank and percentile among all graded attempts."""
+
+    @swagger_auto_schema(manual_parameters=[student_parameter])
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        return self.standing_response(exam_standing(exam, self.get_student_id(request)))
+
+
+class ExaminationTypeStandingView(StandingMixin, APIView):
+    """A student's best percent across an examination type's papers, ranked against every attempt at them."""
+
+    @swagger_auto_schema(manual_parameters=[student_parameter])
+    def get(self, request, pk):
+        examination_type = get_object_or_404(ExaminationType, pk=pk)
+        return self.standing_response(type_standing(examination_type, self.get_student_id(request)))
+
+
+output_parameter = openapi.Parameter(
+    'output',
+    openapi.IN_QUERY,
+    description="Export format: csv (default) or jsonl",
+    type=openapi.TYPE_STRING,
+    enum=list(EXPORT_FORMATS),
+)
+
+
+class QuestionExportMixin:
+    """Streams exam papers to teachers and staff (exports include the answers)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_output(self):
+        output = self.request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Choose one of: {', '.join(EXPORT_FORMATS)}"})
+        return output
+
+    def export(self, exams, filename):
+        if not is_trusted_client(self.request.user):
+            raise PermissionDenied("Only teachers and staff can export questions.")
+        output = self.get_output()
+        return streaming_download(export_questions(exams, output), output, filename)
+
+
+class ExamExportView(QuestionExportMixin, APIView):
+
+    @swagger_auto_schema(manual_parameters=[output_parameter])
+    def get(self, request, pk):
+        exam = get_object_or_404(Exam, pk=pk)
+        return self.export(Exam.objects.filter(pk=exam.pk), f'exam_{exam.pk}_questions')
+
+
+class QuestionBankExportView(QuestionExportMixin, APIView):
+
+    @swagger_auto_schema(manual_parameters=[
+        output_parameter,
+        openapi.Parameter('subject', openapi.IN_QUERY, description="Subject id", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('examination_type', openapi.IN_QUERY, description="Examination type id", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('year', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ])
+    def get(self, request):
+        exams = Exam.objects.all()
+        for field in ('subject', 'examination_type', 'year'):
+            value = request.query_params.get(field)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({field: "Must be an integer."})
+                exams = exams.filter(**{field: value})
+        return self.export(exams, 'question_bank')
+
+
+class QuestionImportView(APIView):
+    """Bulk-import an uploaded CSV/JSONL question bank (the export format)."""
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    @swagger_auto_schema(request_body=QuestionImportSerializer)
+    def post(self, request):
+        if not is_trusted_client(request.user):
+            raise PermissionDenied("Only teachers and staff can import questions.")
+        serializer = QuestionImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        file_format = serializer.validated_data.get('file_format') or (
+            'jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+        )
+        report = import_questions(
+            codecs.iterdecode(upload, 'utf-8-sig'), file_format,
+            exam=serializer.validated_data.get('exam'),
+            update_existing=serializer.validated_data['update_existing'],
+        )
+        return Response(report, status=status.HTTP_200_OK)
+
+
 class ScrapeQuestionsAPIView(APIView):
 
     authentication_classes = []  # ⛔ No auth
@@ -310,102 +519,15 @@ class ScrapeQuestionsAPIView(APIView):
         if not all([subject_name, year, slug]):
             return Response({"error": "Missing required fields."}, status=status.HTTP_400_BAD_REQUEST)
 
-        BASE_URL = 'https://nigerianscholars.com'
-        BASE_PATH = f'/past-questions/{slug}/jamb/year/{year}/'
-        HEADERS = {
-            "User-Agent": "Mozilla/5.0"
-        }
-
-        questions = []
-
-        for page in range(1, max_pages + 1):
-            if page == 1:
-                url = BASE_URL + BASE_PATH
-            else:
-                url = f"{BASE_URL}{BASE_PATH}page/{page}/"
-
-            print(f"Scraping: {url}")
-            response = requests.get(url, headers=HEADERS)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            page_questions = []
-            for q_div in soup.select('.question_block'):
-                question_el = q_div.select_one('.question_text')
-                question_text = question_el.get_text(
-                    strip=True) if question_el else None
-
-                options = [opt.get_text(strip=True)
-                           for opt in q_div.select('.q_option')]
-
-                answer_el = q_div.select_one('.ans_label')
-                answer = answer_el.get_text(strip=True) if answer_el else None
-
-                page_questions.append({
-                    'question': question_text,
-                    'options': options,
-                    'answer': answer
-                })
-
-            if not page_questions:
-                break
-            questions.extend(page_questions)
-
-        # Save to DB
-        subject, _ = Subject.objects.get_or_create(name=subject_name)
-        exam, _ = Exam.objects.get_or_create(
-            subject=subject,
-            title=f"JAMB {year} {subject_name}",
-            examination_type=ExaminationType.objects.get(name='JAMB'),
-            defaults={
-                "description": f"JAMB {year} {subject_name} Questions",
-                "duration": timezone.timedelta(seconds=3600),
-                "total_marks": 100,
-                "year": year,
-                "passing_marks": 40,
-                "start_time": timezone.now(),
-                "end_time": timezone.now() + timezone.timedelta(hours=1),
-                "is_published": True,
-            }
-        )
+        job = ScrapeJob.objects.create(subject_name=subject_name, slug=slug, year=year, pages=max_pages)
+        data = ScrapeJobSerializer(job).data
+        data['status_url'] = request.build_absolute_uri(reverse('scrape-job-detail', args=[job.pk]))
+        return Response(data, status=status.HTTP_202_ACCEPTED)
 
-        for idx, q in enumerate(questions, start=1):
-            question_obj = Question.objects.create(
-                exam=exam,
-                question_text=q['question'],
-                question_type='multiple_choice',
-                marks=1,
-                order=idx
-            )
-            for opt in q['options']:
-                is_correct = (opt == q['answer'])
-                Choice.objects.create(
-                    question=question_obj,
-                    choice_text=opt,
-                    is_correct=is_correct
-                )
-
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        csv_filename = f'scraped_questions_{timestamp}.csv'
-        csv_path = os.path.join("media", csv_filename)
-
-        os.makedirs("media", exist_ok=True)
-        with open(csv_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.writer(csvfile)
-            writer.writerow(['question_text', 'option_1', 'option_2',
-                            'option_3', 'option_4', 'correct_option'])
-            for q in questions:
-                row = [
-                    q['question'],
-                    q['options'][0] if len(q['options']) > 0 else '',
-                    q['options'][1] if len(q['options']) > 1 else '',
-                    q['options'][2] if len(q['options']) > 2 else '',
-                    q['options'][3] if len(q['options']) > 3 else '',
-                    q['answer'] or ''
-                ]
-                writer.writerow(row)
 
-        return Response({
-            "message": "Scraping complete",
-            "questions_scraped": len(questions),
-            "csv_file": csv_filename
-        }, status=200)
+class ScrapeJobDetailView(generics.RetrieveAPIView):
+    """Poll a scrape job queued by ScrapeQuestionsAPIView."""
+    queryset = ScrapeJob.objects.all()
+    serializer_class = ScrapeJobSerializer
+    authentication_classes = []
+    permission_classes = [AllowAny]
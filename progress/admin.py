@@ -1,24 +1,72 @@
 from django.contrib import admin
-from import_export import resources
+from elearning.resources import BulkModelResource
 from import_export.admin import ImportExportModelAdmin
 from .models import CourseProgress, LessonProgress, ExamProgress
+from .stats import rebuild_learning_stats
 
-class CourseProgressResource(resources.ModelResource):
+class CourseProgressResource(BulkModelResource):
     class Meta:
         model = CourseProgress
         fields = ('id', 'student', 'course', 'completed_lessons', 'last_accessed_lesson',
                  'progress_percentage', 'is_completed', 'completed_at', 'created_at',
                  'updated_at')
         export_order = fields
+        # completed_lessons is many-to-many, which bulk imports cannot write
+        use_bulk = False
 
-class LessonProgressResource(resources.ModelResource):
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.imported_ids = set()
+
+    def after_save_instance(self, instance, row, **kwargs):
+        super().after_save_instance(instance, row, **kwargs)
+        self.imported_ids.add(instance.pk)
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        # Imports set completed_lessons directly, bypassing progress.services,
+        # so recount completed_lessons_count and the percentage from it
+        if not kwargs.get('dry_run'):
+            CourseProgress.objects.filter(pk__in=self.imported_ids).reconcile()
+
+class LearningStatsResource(BulkModelResource):
+    # Bulk writes bypass the progress signals that keep LearningStats
+    # current, so the students an import touched are rebuilt afterwards
+    rebuild_batch_size = 500
+
+    def before_import(self, dataset, **kwargs):
+        super().before_import(dataset, **kwargs)
+        self.touched_student_ids = set()
+
+    def after_init_instance(self, instance, new, row, **kwargs):
+        super().after_init_instance(instance, new, row, **kwargs)
+        # Whose row it was before the import reassigns it
+        if not new:
+            self.touched_student_ids.add(instance.student_id)
+
+    def before_save_instance(self, instance, row, **kwargs):
+        super().before_save_instance(instance, row, **kwargs)
+        self.touched_student_ids.add(instance.student_id)
+
+    def before_delete_instance(self, instance, row, **kwargs):
+        super().before_delete_instance(instance, row, **kwargs)
+        self.touched_student_ids.add(instance.student_id)
+
+    def after_import(self, dataset, result, **kwargs):
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get('dry_run'):
+            student_ids = sorted(self.touched_student_ids - {None})
+            for start in range(0, len(student_ids), self.rebuild_batch_size):
+                rebuild_learning_stats(student_ids[start:start + self.rebuild_batch_size])
+
+class LessonProgressResource(LearningStatsResource):
     class Meta:
         model = LessonProgress
         fields = ('id', 'student', 'lesson', 'is_completed', 'completed_at',
                  'time_spent', 'last_position', 'created_at', 'updated_at')
         export_order = fields
 
-class ExamProgressResource(resources.ModelResource):
+class ExamProgressResource(LearningStatsResource):
     class Meta:
         model = ExamProgress
         fields = ('id', 'student', 'exam', 'best_score', 'last_attempt',
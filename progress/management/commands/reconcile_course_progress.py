@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from courses.models import Course
+from progress.models import CourseProgress
+
+
+def pk_ranges(queryset, batch_size):
+    last = queryset.aggregate(last=Max('pk'))['last'] or 0
+    for start in range(0, last, batch_size):
+        yield queryset.filter(pk__gt=start, pk__lte=start + batch_size)
+
+
+class Command(BaseCommand):
+    help = ('Recounts Course.total_lessons and CourseProgress completed counts and percentages '
+            'in batches, fixing any that drifted from the lessons tables')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows updated per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for batch in pk_ranges(Course.objects.all(), batch_size):
+            with transaction.atomic():
+                batch.recount_total_lessons()
+
+        fixed = 0
+        for batch in pk_ranges(CourseProgress.objects.all(), batch_size):
+            with transaction.atomic():
+                fixed += batch.reconcile()
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} course progress row(s)'))
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from progress.stats import rebuild_learning_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the materialized learning-journey stats from the progress tables; run nightly'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', type=int, action='append',
+                            help='Only rebuild this student (repeatable)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Students rebuilt per batch')
+
+    def handle(self, *args, **options):
+        students = get_user_model().objects.filter(user_type='student').order_by('pk')
+        if options['student']:
+            students = students.filter(pk__in=options['student'])
+        student_ids = students.values_list('pk', flat=True)
+
+        batch_size = options['batch_size']
+        rebuilt = 0
+        batch = []
+        for student_id in student_ids.iterator(chunk_size=batch_size):
+            batch.append(student_id)
+            if len(batch) >= batch_size:
+                rebuild_learning_stats(batch)
+                rebuilt += len(batch)
+                batch = []
+        if batch:
+            rebuild_learning_stats(batch)
+            rebuilt += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt learning stats for {rebuilt} student(s)'))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:05
+
+import datetime
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_completed_lessons_count(apps, schema_editor):
+    CourseProgress = apps.get_model('progress', 'CourseProgress')
+    CompletedLesson = CourseProgress.completed_lessons.through
+    completed_count = CompletedLesson.objects.filter(
+        courseprogress=OuterRef('pk')
+    ).order_by().values('courseprogress').annotate(total=Count('pk')).values('total')
+    CourseProgress.objects.update(completed_lessons_count=Coalesce(Subquery(completed_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseprogress',
+            name='completed_lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_completed_lessons_count, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='lessonprogress',
+            name='time_spent',
+            field=models.DurationField(default=datetime.timedelta),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:10
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('progress', '0002_courseprogress_completed_lessons_count'),
+        ('users', '0003_examinationtype_alter_user_examination_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearningStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='learning_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_courses', models.PositiveIntegerField(default=0)),
+                ('completed_courses', models.PositiveIntegerField(default=0)),
+                ('total_lessons', models.PositiveIntegerField(default=0)),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('total_exams', models.PositiveIntegerField(default=0)),
+                ('exam_score_total', models.PositiveIntegerField(default=0)),
+                ('scored_exams', models.PositiveIntegerField(default=0)),
+                ('total_time_spent', models.DurationField(default=datetime.timedelta)),
+                ('daily_lessons_completed', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'learning stats',
+            },
+        ),
+    ]
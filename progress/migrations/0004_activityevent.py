@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_activity_events(apps, schema_editor):
+    ActivityEvent = apps.get_model('progress', 'ActivityEvent')
+    LessonProgress = apps.get_model('progress', 'LessonProgress')
+    ExamAttempt = apps.get_model('exams', 'ExamAttempt')
+    CourseEnrollment = apps.get_model('courses', 'CourseEnrollment')
+
+    def events():
+        for student_id, lesson_id, course_id, completed_at, updated_at in LessonProgress.objects.filter(
+            is_completed=True
+        ).values_list('student_id', 'lesson_id', 'lesson__module__course_id', 'completed_at', 'updated_at').iterator():
+            yield ActivityEvent(student_id=student_id, event_type='lesson_completed', lesson_id=lesson_id,
+                                course_id=course_id, timestamp=completed_at or updated_at)
+        for attempt_id, student_id, exam_id, score, start_time, end_time in ExamAttempt.objects.filter(
+            is_completed=True
+        ).values_list('id', 'student_id', 'exam_id', 'score', 'start_time', 'end_time').iterator():
+            yield ActivityEvent(student_id=student_id, event_type='exam_submitted', exam_id=exam_id,
+                                attempt_id=attempt_id, score=score, timestamp=end_time or start_time)
+        for student_id, course_id, enrollment_date in CourseEnrollment.objects.values_list(
+            'student_id', 'course_id', 'enrollment_date'
+        ).iterator():
+            yield ActivityEvent(student_id=student_id, event_type='course_enrolled', course_id=course_id,
+                                timestamp=enrollment_date)
+
+    batch = []
+    for event in events():
+        batch.append(event)
+        if len(batch) >= 2000:
+            ActivityEvent.objects.bulk_create(batch)
+            batch = []
+    ActivityEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_total_lessons'),
+        ('exams', '0007_scrapejob'),
+        ('progress', '0003_learningstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('lesson_completed', 'Lesson Completed'), ('exam_submitted', 'Exam Submitted'), ('course_enrolled', 'Course Enrolled')], max_length=20)),
+                ('timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('score', models.PositiveIntegerField(blank=True, null=True)),
+                ('attempt', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exams.examattempt')),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.course')),
+                ('exam', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='exams.exam')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='courses.lesson')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['student', '-timestamp'], name='activity_student_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_activity_events, migrations.RunPython.noop),
+    ]
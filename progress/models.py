@@ -1,18 +1,65 @@
+from datetime import timedelta
 from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Least, NullIf
 from django.conf import settings
+from django.utils import timezone
 from courses.models import Course, Lesson
 from exams.models import Exam, ExamAttempt
 
+
+def percentage(completed, total):
+    """progress_percentage as a database expression: whole percent, capped at 100."""
+    return Coalesce(Least(completed * 100 / NullIf(total, 0), Value(100)), Value(0))
+
+
+class CourseProgressQuerySet(models.QuerySet):
+
+    def with_live_progress(self):
+        """
+        Annotate lesson_total, completed_total and live_percentage, counted
+        from the lessons tables rather than read from the stored counters.
+        Each count is its own subquery, so neither multiplies the other.
+        """
+        lesson_total = Lesson.objects.filter(
+            module__course=OuterRef('course_id')
+        ).order_by().values('module__course').annotate(total=Count('pk')).values('total')
+        completed_total = CourseProgress.completed_lessons.through.objects.filter(
+            courseprogress=OuterRef('pk')
+        ).order_by().values('courseprogress').annotate(total=Count('pk')).values('total')
+        return self.annotate(
+            lesson_total=Coalesce(Subquery(lesson_total), 0),
+            completed_total=Coalesce(Subquery(completed_total), 0),
+        ).annotate(
+            live_percentage=percentage(F('completed_total'), F('lesson_total')),
+        )
+
+    def reconcile(self):
+        """Rewrite drifted completed_lessons_count/progress_percentage; returns the rows fixed."""
+        stale = self.with_live_progress().filter(
+            ~Q(completed_lessons_count=F('completed_total')) | ~Q(progress_percentage=F('live_percentage'))
+        )
+        live = CourseProgress.objects.filter(pk=OuterRef('pk')).with_live_progress()
+        return CourseProgress.objects.filter(pk__in=stale.values('pk')).update(
+            completed_lessons_count=Subquery(live.values('completed_total')),
+            progress_percentage=Subquery(live.values('live_percentage')),
+        )
+
+
 class CourseProgress(models.Model):
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='course_progress')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='student_progress')
     completed_lessons = models.ManyToManyField(Lesson, blank=True, related_name='completed_by')
+    # Size of completed_lessons, maintained by progress.services
+    completed_lessons_count = models.PositiveIntegerField(default=0, editable=False)
     last_accessed_lesson = models.ForeignKey(Lesson, on_delete=models.SET_NULL, null=True, blank=True, related_name='last_accessed_by')
     progress_percentage = models.PositiveIntegerField(default=0)
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CourseProgressQuerySet.as_manager()
     
     class Meta:
         unique_together = ('student', 'course')
@@ -25,7 +72,7 @@ class LessonProgress(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='student_progress')
     is_completed = models.BooleanField(default=False)
     completed_at = models.DateTimeField(null=True, blank=True)
-    time_spent = models.DurationField(default=0)
+    time_spent = models.DurationField(default=timedelta)
     last_position = models.PositiveIntegerField(default=0)  # For video progress
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -50,3 +97,54 @@ class ExamProgress(models.Model):
     
     def __str__(self):
         return f"{self.student.username} - {self.exam.title}"
+
+class LearningStats(models.Model):
+    """
+    A student's learning-journey totals, kept current by progress.stats as
+    progress changes so the dashboard is one primary-key read.
+    """
+    student = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='learning_stats')
+    total_courses = models.PositiveIntegerField(default=0)
+    completed_courses = models.PositiveIntegerField(default=0)
+    total_lessons = models.PositiveIntegerField(default=0)
+    completed_lessons = models.PositiveIntegerField(default=0)
+    total_exams = models.PositiveIntegerField(default=0)
+    # Sum and count of non-null ExamProgress.best_score, for the average
+    exam_score_total = models.PositiveIntegerField(default=0)
+    scored_exams = models.PositiveIntegerField(default=0)
+    total_time_spent = models.DurationField(default=timedelta)
+    # Lesson completions per day ('YYYY-MM-DD' -> count), last few days only
+    daily_lessons_completed = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'learning stats'
+
+    def __str__(self):
+        return f"{self.student.username} - learning stats"
+
+class ActivityEvent(models.Model):
+    """Append-only log of what a student did, newest first per student."""
+    EVENT_TYPES = (
+        ('lesson_completed', 'Lesson Completed'),
+        ('exam_submitted', 'Exam Submitted'),
+        ('course_enrolled', 'Course Enrolled'),
+    )
+
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='activity_events')
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    timestamp = models.DateTimeField(default=timezone.now)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    score = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['student', '-timestamp'], name='activity_student_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.get_event_type_display()}"
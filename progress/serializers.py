@@ -1,7 +1,7 @@
 from rest_framework import serializers
 from .models import CourseProgress, LessonProgress, ExamProgress
 from courses.serializers import CourseSerializer, LessonSerializer
-from exams.serializers import ExamSerializer
+from exams.serializers import ExamSerializer, ExamSummarySerializer
 from django.db import models
 
 class LessonProgressSerializer(serializers.ModelSerializer):
@@ -23,8 +23,14 @@ class CourseProgressSerializer(serializers.ModelSerializer):
                  'progress_percentage', 'is_completed', 'completed_at')
         read_only_fields = ('id', 'course', 'progress_percentage', 'is_completed')
 
+class CourseProgressListSerializer(CourseProgressSerializer):
+    # Expects CourseProgress.objects.with_live_progress(). Leaves out each
+    # course's student roster, which a progress list has no use for
+    course = CourseSerializer(read_only=True, context={'expand': {'modules'}})
+    progress_percentage = serializers.IntegerField(source='live_percentage', read_only=True)
+
 class ExamProgressSerializer(serializers.ModelSerializer):
-    exam = ExamSerializer(read_only=True)
+    exam = ExamSummarySerializer(read_only=True)
     
     class Meta:
         model = ExamProgress
@@ -43,12 +49,10 @@ class CourseProgressOverviewSerializer(serializers.ModelSerializer):
                  'completed_lessons_count', 'upcoming_exams')
     
     def get_total_lessons(self, obj):
-        return obj.course.modules.aggregate(
-            total_lessons=models.Count('lessons')
-        )['total_lessons']
+        return obj.course.total_lessons
     
     def get_completed_lessons_count(self, obj):
-        return obj.completed_lessons.count()
+        return obj.completed_lessons_count
     
     def get_upcoming_exams(self, obj):
         from django.utils import timezone
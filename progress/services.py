@@ -0,0 +1,105 @@
+"""
+Lesson completion bookkeeping.
+
+CourseProgress.completed_lessons_count and Course.total_lessons are counters,
+so completing a lesson is a guarded insert into the completed_lessons table
+plus one UPDATE computed from F() expressions: no recount of the course, and
+two concurrent completions of different lessons both land.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import ActivityEvent, CourseProgress, percentage
+from .stats import bump_learning_stats
+
+CompletedLesson = CourseProgress.completed_lessons.through
+
+
+def complete_lesson(course_progress, lesson, total_lessons):
+    """
+    Add ``lesson`` to ``course_progress``'s completed lessons. Returns False
+    when it was already there, in which case nothing is updated.
+    """
+    try:
+        # The through table's unique (courseprogress, lesson) constraint makes
+        # this the guard against double counting, even across requests.
+        with transaction.atomic():
+            CompletedLesson.objects.create(courseprogress_id=course_progress.pk, lesson_id=lesson.pk)
+    except IntegrityError:
+        return False
+
+    now = timezone.now()
+    completed = F('completed_lessons_count') + 1
+    updates = {
+        'completed_lessons_count': completed,
+        'progress_percentage': percentage(completed, total_lessons),
+        'last_accessed_lesson': lesson,
+        'updated_at': now,
+    }
+    if total_lessons:
+        # Compared against the pre-update count, hence the - 1
+        finished = Q(completed_lessons_count__gte=total_lessons - 1)
+        updates['is_completed'] = Case(When(finished, then=Value(True)), default=F('is_completed'))
+        updates['completed_at'] = Case(
+            When(finished & Q(completed_at__isnull=True), then=Value(now)), default=F('completed_at')
+        )
+    CourseProgress.objects.filter(pk=course_progress.pk).update(**updates)
+    return True
+
+
+def uncomplete_lesson(course_progress, lesson, total_lessons):
+    """Remove ``lesson`` from the completed lessons; False if it was not there."""
+    deleted, _ = CompletedLesson.objects.filter(
+        courseprogress_id=course_progress.pk, lesson_id=lesson.pk
+    ).delete()
+    if not deleted:
+        return False
+
+    completed = Greatest(F('completed_lessons_count') - 1, Value(0))
+    CourseProgress.objects.filter(pk=course_progress.pk).update(
+        completed_lessons_count=completed,
+        progress_percentage=percentage(completed, total_lessons),
+        is_completed=False,
+        completed_at=None,
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def sync_lesson_completion(lesson_progress, flipped=True):
+    """
+    Bring the student's CourseProgress in line with ``lesson_progress``'s
+    is_completed flag. ``flipped`` says whether that flag has just changed,
+    for the learning stats. Returns the CourseProgress, refreshed.
+    """
+    lesson = lesson_progress.lesson
+    course = lesson.module.course
+    course_progress, _ = CourseProgress.objects.get_or_create(
+        student_id=lesson_progress.student_id,
+        course_id=course.pk,
+    )
+    was_completed = course_progress.is_completed
+    if lesson_progress.is_completed:
+        changed = complete_lesson(course_progress, lesson, course.total_lessons)
+    else:
+        changed = uncomplete_lesson(course_progress, lesson, course.total_lessons)
+    if changed:
+        course_progress.refresh_from_db()
+    if flipped or course_progress.is_completed != was_completed:
+        bump_learning_stats(
+            lesson_progress.student_id,
+            lessons_completed_on=timezone.localdate(lesson_progress.completed_at or timezone.now()),
+            completed_lessons=(1 if lesson_progress.is_completed else -1) if flipped else 0,
+            completed_courses=int(course_progress.is_completed) - int(was_completed),
+        )
+    if flipped and lesson_progress.is_completed:
+        ActivityEvent.objects.create(
+            student_id=lesson_progress.student_id,
+            event_type='lesson_completed',
+            timestamp=lesson_progress.completed_at or timezone.now(),
+            course_id=course.pk,
+            lesson_id=lesson.pk,
+        )
+    return course_progress
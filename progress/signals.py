@@ -0,0 +1,141 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from courses.models import Course, CourseEnrollment, Lesson
+from elearning.signals import deleted_via
+from exams.signals import attempt_graded
+from .models import ActivityEvent, CourseProgress, ExamProgress, LessonProgress
+from .stats import bump_learning_stats
+
+
+@receiver(attempt_graded)
+def record_graded_attempt(sender, attempt, **kwargs):
+    # Locked for the rest of the grading transaction, so two gradings for the
+    # same student and exam read best_score (and bump the stats) in turn
+    progress, created = ExamProgress.objects.select_for_update().get_or_create(
+        student_id=attempt.student_id,
+        exam_id=attempt.exam_id
+    )
+    ExamProgress.objects.filter(pk=progress.pk).update(
+        best_score=Greatest(Coalesce(F('best_score'), Value(0)), Value(attempt.score)),
+        last_attempt=attempt,
+        updated_at=timezone.now()
+    )
+    ExamProgress.attempts.through.objects.create(examprogress=progress, examattempt=attempt)
+    ActivityEvent.objects.create(
+        student_id=attempt.student_id,
+        event_type='exam_submitted',
+        timestamp=attempt.end_time or timezone.now(),
+        exam_id=attempt.exam_id,
+        attempt=attempt,
+        score=attempt.score,
+    )
+
+    previous_best = progress.best_score or 0
+    if progress.best_score is None or attempt.score > previous_best:
+        bump_learning_stats(
+            attempt.student_id,
+            scored_exams=int(progress.best_score is None),
+            exam_score_total=max(attempt.score, previous_best) - previous_best,
+        )
+
+
+@receiver(post_save, sender=CourseEnrollment)
+def enrollment_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ActivityEvent.objects.create(
+            student_id=instance.student_id,
+            event_type='course_enrolled',
+            timestamp=instance.enrollment_date,
+            course_id=instance.course_id,
+        )
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def students_added(sender, instance, action, reverse, pk_set, **kwargs):
+    # course.students.add() bulk-creates CourseEnrollment rows without post_save
+    if action != 'post_add' or not pk_set:
+        return
+    now = timezone.now()
+    if reverse:
+        pairs = [(instance.pk, course_id) for course_id in pk_set]
+    else:
+        pairs = [(student_id, instance.pk) for student_id in pk_set]
+    ActivityEvent.objects.bulk_create([
+        ActivityEvent(student_id=student_id, event_type='course_enrolled', timestamp=now, course_id=course_id)
+        for student_id, course_id in pairs
+    ])
+
+
+@receiver(pre_delete, sender=Lesson)
+def forget_completed_lesson(sender, instance, **kwargs):
+    # The completed_lessons rows go with the lesson, so drop them from the counters
+    CourseProgress.objects.filter(completed_lessons=instance).update(
+        completed_lessons_count=Greatest(F('completed_lessons_count') - 1, Value(0)),
+        updated_at=timezone.now()
+    )
+
+
+# Learning stats (see progress.stats). Rows deleted along with their student
+# take the stats row with them, so there is nothing to adjust.
+
+@receiver(post_save, sender=CourseProgress)
+def course_progress_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_learning_stats(instance.student_id, total_courses=1, completed_courses=int(instance.is_completed))
+
+
+@receiver(post_delete, sender=CourseProgress)
+def course_progress_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_via(origin, get_user_model()):
+        bump_learning_stats(instance.student_id, total_courses=-1, completed_courses=-int(instance.is_completed))
+
+
+@receiver(post_save, sender=LessonProgress)
+def lesson_progress_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_learning_stats(
+            instance.student_id,
+            time_spent=instance.time_spent,
+            lessons_completed_on=timezone.localdate(instance.completed_at or timezone.now()),
+            total_lessons=1,
+            completed_lessons=int(instance.is_completed),
+        )
+
+
+@receiver(post_delete, sender=LessonProgress)
+def lesson_progress_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_via(origin, get_user_model()):
+        bump_learning_stats(
+            instance.student_id,
+            time_spent=-instance.time_spent,
+            lessons_completed_on=instance.completed_at and timezone.localdate(instance.completed_at),
+            total_lessons=-1,
+            completed_lessons=-int(instance.is_completed),
+        )
+
+
+@receiver(post_save, sender=ExamProgress)
+def exam_progress_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_learning_stats(
+            instance.student_id,
+            total_exams=1,
+            scored_exams=int(instance.best_score is not None),
+            exam_score_total=instance.best_score or 0,
+        )
+
+
+@receiver(post_delete, sender=ExamProgress)
+def exam_progress_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_via(origin, get_user_model()):
+        bump_learning_stats(
+            instance.student_id,
+            total_exams=-1,
+            scored_exams=-int(instance.best_score is not None),
+            exam_score_total=-(instance.best_score or 0),
+        )
@@ -0,0 +1,120 @@
+"""
+Materialized learning-journey stats (progress.models.LearningStats).
+
+Progress writes call ``bump_learning_stats`` with the change they made: a
+locked read-modify-write of the student's one row. Lesson completions are
+also counted into per-day buckets, so the recent-activity window is a sum
+over a handful of keys instead of a range scan. A student without a row
+gets one built from the progress tables on first touch, and
+``rebuild_learning_stats`` (run nightly by ``manage.py
+reconcile_learning_stats``) recomputes rows from scratch to correct drift.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CourseProgress, ExamProgress, LearningStats, LessonProgress
+
+# Days reported as recent activity, and kept as buckets
+WINDOW_DAYS = 7
+
+COUNTERS = ('total_courses', 'completed_courses', 'total_lessons', 'completed_lessons',
+            'total_exams', 'exam_score_total', 'scored_exams')
+
+
+def _window_start():
+    return timezone.localdate() - timedelta(days=WINDOW_DAYS - 1)
+
+
+def _prune(buckets):
+    start = _window_start().isoformat()
+    return {day: count for day, count in buckets.items() if day >= start and count > 0}
+
+
+def bump_learning_stats(student_id, time_spent=None, lessons_completed_on=None, **deltas):
+    """
+    Apply counter ``deltas`` (e.g. ``completed_lessons=1``) and a
+    ``time_spent`` timedelta to the student's stats. ``lessons_completed_on``
+    is the date to count ``completed_lessons`` changes against in the daily
+    buckets.
+    """
+    with transaction.atomic():
+        stats = LearningStats.objects.select_for_update().filter(pk=student_id).first()
+        if stats is None:
+            # Built from the tables, which already include this change
+            rebuild_learning_stats([student_id])
+            return
+        for field, delta in deltas.items():
+            setattr(stats, field, max(getattr(stats, field) + delta, 0))
+        if time_spent:
+            stats.total_time_spent = max(stats.total_time_spent + time_spent, timedelta())
+        buckets = stats.daily_lessons_completed
+        if lessons_completed_on and deltas.get('completed_lessons'):
+            day = lessons_completed_on.isoformat()
+            buckets[day] = buckets.get(day, 0) + deltas['completed_lessons']
+        stats.daily_lessons_completed = _prune(buckets)
+        stats.save()
+
+
+def rebuild_learning_stats(student_ids):
+    """Recompute the stats rows of ``student_ids`` from the progress tables."""
+    student_ids = list(student_ids)
+    rows = {student_id: LearningStats(student_id=student_id) for student_id in student_ids}
+
+    courses = CourseProgress.objects.filter(student_id__in=student_ids).order_by().values('student_id').annotate(
+        total=Count('pk'), completed=Count('pk', filter=Q(is_completed=True)),
+    )
+    for row in courses:
+        stats = rows[row['student_id']]
+        stats.total_courses, stats.completed_courses = row['total'], row['completed']
+
+    lessons = LessonProgress.objects.filter(student_id__in=student_ids).order_by().values('student_id').annotate(
+        total=Count('pk'), completed=Count('pk', filter=Q(is_completed=True)), time_spent=Sum('time_spent'),
+    )
+    for row in lessons:
+        stats = rows[row['student_id']]
+        stats.total_lessons, stats.completed_lessons = row['total'], row['completed']
+        stats.total_time_spent = row['time_spent'] or timedelta()
+
+    exams = ExamProgress.objects.filter(student_id__in=student_ids).order_by().values('student_id').annotate(
+        total=Count('pk'), scored=Count('best_score'), score_total=Sum('best_score'),
+    )
+    for row in exams:
+        stats = rows[row['student_id']]
+        stats.total_exams, stats.scored_exams = row['total'], row['scored']
+        stats.exam_score_total = row['score_total'] or 0
+
+    days = LessonProgress.objects.filter(
+        student_id__in=student_ids, is_completed=True, completed_at__date__gte=_window_start()
+    ).order_by().values('student_id', day=TruncDate('completed_at')).annotate(total=Count('pk'))
+    for row in days:
+        rows[row['student_id']].daily_lessons_completed[row['day'].isoformat()] = row['total']
+
+    existing = set(LearningStats.objects.filter(pk__in=student_ids).values_list('pk', flat=True))
+    now = timezone.now()
+    for stats in rows.values():
+        stats.updated_at = now
+    with transaction.atomic():
+        LearningStats.objects.bulk_create(
+            [stats for student_id, stats in rows.items() if student_id not in existing],
+            ignore_conflicts=True,
+        )
+        LearningStats.objects.bulk_update(
+            [stats for student_id, stats in rows.items() if student_id in existing],
+            COUNTERS + ('total_time_spent', 'daily_lessons_completed', 'updated_at'),
+        )
+
+
+def get_learning_stats(student):
+    stats = LearningStats.objects.filter(pk=student.pk).first()
+    if stats is None:
+        rebuild_learning_stats([student.pk])
+        stats = LearningStats.objects.get(pk=student.pk)
+    return stats
+
+
+def recent_lessons_completed(stats):
+    return sum(_prune(stats.daily_lessons_completed).values())
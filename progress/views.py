@@ -2,16 +2,23 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.utils import timezone
-from .models import CourseProgress, LessonProgress, ExamProgress
+from courses.models import Course
+from courses.outline import get_course_outline
+from exams.models import Exam
+from .models import ActivityEvent, CourseProgress, LessonProgress, ExamProgress
+from .services import sync_lesson_completion
+from .stats import WINDOW_DAYS, bump_learning_stats, get_learning_stats, recent_lessons_completed
 from .serializers import (
     CourseProgressSerializer, LessonProgressSerializer,
-    ExamProgressSerializer, CourseProgressOverviewSerializer
+    ExamProgressSerializer, CourseProgressOverviewSerializer,
+    CourseProgressListSerializer
 )
 from django.db import models
 from rest_framework.exceptions import PermissionDenied
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.db.models import Count, Avg, Max
+from django.db.models import Count, Avg, Max, Prefetch
+from django.contrib.auth import get_user_model
 from datetime import timedelta
 
 # Create your views here.
@@ -34,7 +41,7 @@ class LessonProgressView(generics.RetrieveUpdateAPIView):
     
     def get_object(self):
         lesson_id = self.kwargs['lesson_id']
-        progress, created = LessonProgress.objects.get_or_create(
+        progress, created = LessonProgress.objects.select_related('lesson__module__course').get_or_create(
             student=self.request.user,
             lesson_id=lesson_id
         )
@@ -42,21 +49,17 @@ class LessonProgressView(generics.RetrieveUpdateAPIView):
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
+        was_completed = instance.is_completed
+        previous_time_spent = instance.time_spent
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
         # Update course progress
-        course_progress = CourseProgress.objects.get(
-            student=self.request.user,
-            course=instance.lesson.module.course
-        )
-        total_lessons = instance.lesson.module.course.modules.aggregate(
-            total_lessons=models.Count('lessons')
-        )['total_lessons']
-        completed_lessons = course_progress.completed_lessons.count()
-        course_progress.progress_percentage = (completed_lessons / total_lessons) * 100
-        course_progress.save()
+        if instance.is_completed != was_completed:
+            sync_lesson_completion(instance)
+        if instance.time_spent != previous_time_spent:
+            bump_learning_stats(instance.student_id, time_spent=instance.time_spent - previous_time_spent)
         
         return Response(serializer.data)
 
@@ -66,7 +69,7 @@ class LessonCompletionView(generics.UpdateAPIView):
     
     def get_object(self):
         lesson_id = self.kwargs['lesson_id']
-        progress, created = LessonProgress.objects.get_or_create(
+        progress, created = LessonProgress.objects.select_related('lesson__module__course').get_or_create(
             student=self.request.user,
             lesson_id=lesson_id
         )
@@ -74,30 +77,15 @@ class LessonCompletionView(generics.UpdateAPIView):
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.is_completed = True
-        instance.completed_at = timezone.now()
-        instance.save()
-        
-        # Update course progress
-        course_progress = CourseProgress.objects.get(
-            student=self.request.user,
-            course=instance.lesson.module.course
+        now = timezone.now()
+        # Conditional, so completing a lesson twice keeps the first completed_at
+        flipped = LessonProgress.objects.filter(pk=instance.pk, is_completed=False).update(
+            is_completed=True, completed_at=now, updated_at=now
         )
-        course_progress.completed_lessons.add(instance.lesson)
+        instance.refresh_from_db(fields=['is_completed', 'completed_at', 'updated_at'])
         
-        # Calculate progress percentage
-        total_lessons = instance.lesson.module.course.modules.aggregate(
-            total_lessons=models.Count('lessons')
-        )['total_lessons']
-        completed_lessons = course_progress.completed_lessons.count()
-        course_progress.progress_percentage = (completed_lessons / total_lessons) * 100
-        
-        # Check if course is completed
-        if completed_lessons == total_lessons:
-            course_progress.is_completed = True
-            course_progress.completed_at = timezone.now()
-        
-        course_progress.save()
+        # Update course progress (counters, no recount)
+        sync_lesson_completion(instance, flipped=bool(flipped))
         
         return Response(self.get_serializer(instance).data)
 
@@ -126,49 +114,28 @@ class CourseProgressOverviewView(generics.RetrieveAPIView):
         return progress
 
 class CourseProgressListView(generics.ListAPIView):
-    serializer_class = CourseProgressSerializer
+    """
+    The student's course progress. Read-only: percentages are computed in the
+    query (see CourseProgressQuerySet.with_live_progress) and the stored
+    values are corrected by `manage.py reconcile_course_progress`.
+    """
+    serializer_class = CourseProgressListSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
     
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return CourseProgress.objects.none()
-            
-        try:
-            # Get all course progress for the user
-            queryset = CourseProgress.objects.filter(student=self.request.user)
-            
-            # Prefetch related course data to avoid N+1 queries
-            queryset = queryset.select_related('course')
-            
-            # Annotate with additional data
-            queryset = queryset.annotate(
-                total_lessons=models.Count('course__modules__lessons'),
-                completed_lessons_count=models.Count('completed_lessons'),
-            )
-            
-            # Calculate progress percentage
-            for progress in queryset:
-                if progress.total_lessons > 0:
-                    progress.progress_percentage = (progress.completed_lessons_count / progress.total_lessons) * 100
-                else:
-                    progress.progress_percentage = 0
-                progress.save()
-            
-            return queryset
-        except Exception as e:
-            print(f"Error in CourseProgressListView: {str(e)}")
-            return CourseProgress.objects.none()
-    
-    def list(self, request, *args, **kwargs):
-        try:
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except Exception as e:
-            return Response(
-                {"detail": f"Error fetching course progress: {str(e)}"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        return CourseProgress.objects.filter(
+            student=self.request.user
+        ).with_live_progress().select_related(
+            'last_accessed_lesson'
+        ).prefetch_related(
+            # What CourseProgressListSerializer renders: no student roster
+            Prefetch('course', queryset=Course.objects.select_related('instructor').with_stats().with_modules()),
+            Prefetch('course__ratings', queryset=get_user_model().objects.only('id')),
+            'completed_lessons',
+        )
 
 class CourseProgressDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = CourseProgressSerializer
@@ -204,7 +171,9 @@ class ExamProgressListView(generics.ListAPIView):
     def get_queryset(self):
         if getattr(self, 'swagger_fake_view', False):
             return ExamProgress.objects.none()
-        return ExamProgress.objects.filter(student=self.request.user)
+        return ExamProgress.objects.filter(student=self.request.user).prefetch_related(
+            Prefetch('exam', queryset=Exam.objects.with_question_count())
+        )
 
 class ExamProgressDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = ExamProgressSerializer
@@ -219,44 +188,22 @@ class LearningJourneyStatsView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, *args, **kwargs):
-        user = request.user
-        
-        # Get overall statistics
-        total_courses = CourseProgress.objects.filter(student=user).count()
-        completed_courses = CourseProgress.objects.filter(student=user, is_completed=True).count()
-        total_lessons = LessonProgress.objects.filter(student=user).count()
-        completed_lessons = LessonProgress.objects.filter(student=user, is_completed=True).count()
-        total_exams = ExamProgress.objects.filter(student=user).count()
-        
-        # Calculate average scores
-        avg_exam_score = ExamProgress.objects.filter(
-            student=user,
-            best_score__isnull=False
-        ).aggregate(avg_score=Avg('best_score'))['avg_score'] or 0
-        
-        # Get time spent learning
-        total_time_spent = LessonProgress.objects.filter(
-            student=user
-        ).aggregate(total_time=models.Sum('time_spent'))['total_time'] or timedelta()
+        # Materialized per student, see progress.stats
+        stats = get_learning_stats(request.user)
         
-        # Get recent activity (last 7 days)
-        seven_days_ago = timezone.now() - timedelta(days=7)
-        recent_lessons = LessonProgress.objects.filter(
-            student=user,
-            updated_at__gte=seven_days_ago
-        ).count()
+        avg_exam_score = stats.exam_score_total / stats.scored_exams if stats.scored_exams else 0
         
         return Response({
-            'total_courses': total_courses,
-            'completed_courses': completed_courses,
-            'total_lessons': total_lessons,
-            'completed_lessons': completed_lessons,
-            'total_exams': total_exams,
+            'total_courses': stats.total_courses,
+            'completed_courses': stats.completed_courses,
+            'total_lessons': stats.total_lessons,
+            'completed_lessons': stats.completed_lessons,
+            'total_exams': stats.total_exams,
             'average_exam_score': round(avg_exam_score, 2),
-            'total_time_spent': str(total_time_spent),
+            'total_time_spent': str(stats.total_time_spent),
             'recent_activity': {
-                'lessons_completed': recent_lessons,
-                'days_active': 7
+                'lessons_completed': recent_lessons_completed(stats),
+                'days_active': WINDOW_DAYS
             }
         })
 
@@ -264,41 +211,36 @@ class RecentActivityView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, *args, **kwargs):
-        user = request.user
-        recent_activities = []
-        
-        # Get recent lesson completions
-        recent_lessons = LessonProgress.objects.filter(
-            student=user,
-            is_completed=True
-        ).order_by('-completed_at')[:5]
-        
-        for lesson in recent_lessons:
-            recent_activities.append({
-                'type': 'lesson',
-                'title': lesson.lesson.title,
-                'timestamp': lesson.completed_at,
-                'course': lesson.lesson.module.course.title
-            })
-        
-        # Get recent exam attempts
-        recent_exams = ExamProgress.objects.filter(
-            student=user,
-            last_attempt__isnull=False
-        ).order_by('-last_attempt')[:5]
+        # One range read on the (student, -timestamp) index
+        events = ActivityEvent.objects.filter(
+            student=request.user
+        ).select_related('course', 'lesson', 'exam').order_by('-timestamp')[:10]
         
-        for exam in recent_exams:
-            recent_activities.append({
-                'type': 'exam',
-                'title': exam.exam.title,
-                'timestamp': exam.last_attempt,
-                'score': exam.best_score
-            })
-        
-        # Sort by timestamp
-        recent_activities.sort(key=lambda x: x['timestamp'], reverse=True)
+        recent_activities = []
+        for event in events:
+            if event.event_type == 'lesson_completed':
+                recent_activities.append({
+                    'type': 'lesson',
+                    'title': event.lesson.title,
+                    'timestamp': event.timestamp,
+                    'course': event.course.title
+                })
+            elif event.event_type == 'exam_submitted':
+                recent_activities.append({
+                    'type': 'exam',
+                    'title': event.exam.title,
+                    'timestamp': event.timestamp,
+                    'score': event.score
+                })
+            else:
+                recent_activities.append({
+                    'type': 'enrollment',
+                    'title': event.course.title,
+                    'timestamp': event.timestamp,
+                    'course': event.course.title
+                })
         
-        return Response(recent_activities[:10])  # Return top 10 most recent activities
+        return Response(recent_activities)
 
 class LearningPathView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -307,7 +249,7 @@ class LearningPathView(generics.RetrieveAPIView):
         user = request.user
         
         try:
-            course_progress = CourseProgress.objects.get(
+            course_progress = CourseProgress.objects.select_related('course').get(
                 student=user,
                 course_id=course_id
             )
@@ -317,33 +259,38 @@ class LearningPathView(generics.RetrieveAPIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get all lessons in the course
-        lessons = course_progress.course.modules.prefetch_related('lessons').all()
+        # Modules and lessons from the cached outline, the student's progress
+        # on all of them in one query
+        outline = get_course_outline(course_progress.course)
+        lesson_progress = {
+            row['lesson_id']: row
+            for row in LessonProgress.objects.filter(
+                student=user,
+                lesson__module__course_id=course_id
+            ).values('lesson_id', 'is_completed', 'time_spent', 'last_position')
+        }
         
         learning_path = []
-        for module in lessons:
+        for module_id, module_title, lessons in outline:
             module_path = {
-                'module': module.title,
+                'module': module_title,
                 'lessons': []
             }
             
-            for lesson in module.lessons.all():
-                try:
-                    lesson_progress = LessonProgress.objects.get(
-                        student=user,
-                        lesson=lesson
-                    )
+            for lesson_id, lesson_title in lessons:
+                progress = lesson_progress.get(lesson_id)
+                if progress is not None:
                     lesson_status = {
-                        'id': lesson.id,
-                        'title': lesson.title,
-                        'is_completed': lesson_progress.is_completed,
-                        'time_spent': str(lesson_progress.time_spent),
-                        'last_position': lesson_progress.last_position
+                        'id': lesson_id,
+                        'title': lesson_title,
+                        'is_completed': progress['is_completed'],
+                        'time_spent': str(progress['time_spent']),
+                        'last_position': progress['last_position']
                     }
-                except LessonProgress.DoesNotExist:
+                else:
                     lesson_status = {
-                        'id': lesson.id,
-                        'title': lesson.title,
+                        'id': lesson_id,
+                        'title': lesson_title,
                         'is_completed': False,
                         'time_spent': '0:00:00',
                         'last_position': 0
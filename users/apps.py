@@ -19,3 +19,4 @@ class UsersConfig(AppConfig):
                         if name:
                             ExaminationType.objects.get_or_create(name=name)
         post_migrate.connect(load_examination_types, sender=self)
+        import users.signals
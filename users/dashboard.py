@@ -0,0 +1,67 @@
+"""
+Staff dashboard numbers, cached.
+
+A teacher's figures come from two conditional aggregates (their courses,
+and enrollments in them) and are cached per teacher for
+settings.STAFF_DASHBOARD_CACHE_TIMEOUT seconds. The exam totals are the same
+for every teacher, so they get one shared entry. Course, enrollment and exam
+signals (see users.signals) drop the entries they affect; the short TTL
+bounds staleness where a cache is per process.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from courses.models import Course, CourseEnrollment
+from exams.models import Exam
+
+EXAM_TOTALS_CACHE_KEY = 'users:staff-dashboard:exams'
+
+RECENT_DAYS = 30
+
+
+def teacher_dashboard_cache_key(teacher_id):
+    return f'users:staff-dashboard:{teacher_id}'
+
+
+def exam_totals():
+    totals = cache.get(EXAM_TOTALS_CACHE_KEY)
+    if totals is None:
+        totals = Exam.objects.aggregate(
+            total_exams=Count('pk'),
+            active_exams=Count('pk', filter=Q(is_published=True)),
+        )
+        cache.set(EXAM_TOTALS_CACHE_KEY, totals, settings.STAFF_DASHBOARD_CACHE_TIMEOUT)
+    return totals
+
+
+def teacher_totals(teacher_id):
+    cache_key = teacher_dashboard_cache_key(teacher_id)
+    totals = cache.get(cache_key)
+    if totals is None:
+        totals = Course.objects.filter(instructor_id=teacher_id).aggregate(
+            total_courses=Count('pk'),
+            total_revenue=Sum('price'),
+        )
+        totals.update(CourseEnrollment.objects.filter(course__instructor_id=teacher_id).aggregate(
+            total_students=Count('student', distinct=True),
+            recent_enrollments=Count('pk', filter=Q(
+                enrollment_date__gte=timezone.now() - timezone.timedelta(days=RECENT_DAYS)
+            )),
+        ))
+        totals['total_revenue'] = totals['total_revenue'] or 0
+        cache.set(cache_key, totals, settings.STAFF_DASHBOARD_CACHE_TIMEOUT)
+    return totals
+
+
+def staff_dashboard(teacher_id):
+    return {**teacher_totals(teacher_id), **exam_totals()}
+
+
+def invalidate_teacher_dashboards(*teacher_ids):
+    cache.delete_many([teacher_dashboard_cache_key(teacher_id) for teacher_id in set(teacher_ids)])
+
+
+def invalidate_exam_totals():
+    cache.delete(EXAM_TOTALS_CACHE_KEY)
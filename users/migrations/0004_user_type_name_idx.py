@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0003_examinationtype_alter_user_examination_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['user_type', 'first_name', 'last_name', 'id'], name='user_type_name_idx'),
+        ),
+    ]
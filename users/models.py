@@ -17,6 +17,12 @@ class User(AbstractUser):
     institution_name = models.CharField(max_length=255, blank=True)
     examination_type = models.ForeignKey('ExaminationType', null=True, blank=True, on_delete=models.SET_NULL)
     grade = models.CharField(max_length=50, blank=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Staff student roster, keyset-paginated by name
+            models.Index(fields=['user_type', 'first_name', 'last_name', 'id'], name='user_type_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
@@ -61,4 +61,37 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'user_type',
                  'profile_picture', 'bio', 'date_of_birth', 'phone_number', 'address',
                  'institution_name', 'examination_type', 'examination_type_id', 'grade')
-        read_only_fields = ('id', 'username', 'user_type') 
\ No newline at end of file
+        read_only_fields = ('id', 'username', 'user_type')
+
+
+class StaffStudentSerializer(serializers.ModelSerializer):
+    # Expects the annotations from StaffStudentsView.get_queryset
+    name = serializers.SerializerMethodField()
+    studentId = serializers.CharField(source='username', read_only=True)  # Using username as student ID
+    enrollmentDate = serializers.SerializerMethodField()
+    program = serializers.SerializerMethodField()
+    status = serializers.SerializerMethodField()
+    gpa = serializers.SerializerMethodField()
+    totalCourses = serializers.IntegerField(source='total_courses', read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'name', 'email', 'studentId', 'enrollmentDate', 'program',
+                  'status', 'gpa', 'totalCourses')
+
+    def get_name(self, obj):
+        return f"{obj.first_name} {obj.last_name}"
+
+    def get_enrollmentDate(self, obj):
+        # Earliest enrollment, or when the account was created
+        return (obj.first_enrollment or obj.date_joined).isoformat()
+
+    def get_program(self, obj):
+        return 'General Studies'  # Default program
+
+    def get_status(self, obj):
+        return 'Active' if obj.is_active else 'Inactive'
+
+    def get_gpa(self, obj):
+        # Average course progress percentage on a 4.0 scale
+        return round((obj.average_progress or 0) / 100 * 4.0, 2)
@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Course, CourseEnrollment
+from elearning.signals import deleted_via
+from exams.models import Exam
+from .dashboard import invalidate_exam_totals, invalidate_teacher_dashboards
+
+
+@receiver([post_save, post_delete], sender=Course)
+def course_changed(sender, instance, **kwargs):
+    invalidate_teacher_dashboards(instance.instructor_id)
+
+
+@receiver([post_save, post_delete], sender=CourseEnrollment)
+def enrollment_changed(sender, instance, origin=None, **kwargs):
+    if deleted_via(origin, Course):
+        return
+    invalidate_teacher_dashboards(
+        *Course.objects.filter(pk=instance.course_id).values_list('instructor_id', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def students_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # course.students.add()/remove()/clear() skip the CourseEnrollment signals
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidate_teacher_dashboards(instance.instructor_id)
+        return
+    courses = Course.objects.filter(pk__in=pk_set) if pk_set else Course.objects.filter(students=instance)
+    invalidate_teacher_dashboards(*courses.values_list('instructor_id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Exam)
+def exam_changed(sender, instance, **kwargs):
+    invalidate_exam_totals()
@@ -2,14 +2,16 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from .serializers import UserRegistrationSerializer, UserProfileSerializer, ExaminationTypeSerializer
+from .serializers import UserRegistrationSerializer, UserProfileSerializer, ExaminationTypeSerializer, StaffStudentSerializer
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.views import APIView
-from courses.models import Course, CourseEnrollment
-from exams.models import Exam
+from courses.models import CourseEnrollment
 from progress.models import CourseProgress
-from django.db.models import Avg, Sum
-from django.utils import timezone
+from django.db.models import Avg, Count, FloatField, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import PermissionDenied
+from elearning.pagination import KeysetPagination, StaffPageSizeMixin
+from .dashboard import staff_dashboard
 from .models import ExaminationType
 
 User = get_user_model()
@@ -62,48 +64,44 @@ class StaffProfileUpdateView(generics.UpdateAPIView):
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
         return self.request.user
 
-class StaffStudentsView(APIView):
+class StaffStudentPagination(StaffPageSizeMixin, KeysetPagination):
+    ordering = ('first_name', 'last_name', 'id')
+    page_size = 50
+    max_page_size = 50
+
+class StaffStudentsView(generics.ListAPIView):
+    """
+    Student roster for teachers, one annotated query per page. `?search=`
+    matches name, email or username; follow `next` for further pages.
+    """
+    serializer_class = StaffStudentSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = StaffStudentPagination
     
-    def get(self, request):
-        if request.user.user_type != 'teacher':
-            return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
-        
-        students = User.objects.filter(user_type='student').order_by('first_name', 'last_name')
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return User.objects.none()
+        if self.request.user.user_type != 'teacher':
+            raise PermissionDenied("Not authorized")
         
-        student_data = []
-        for student in students:
-            # Get enrollment info using CourseEnrollment model directly
-            enrollments = CourseEnrollment.objects.filter(student=student)
-            total_courses = enrollments.count()
-            
-            # Calculate GPA (average of all course progress percentages)
-            course_progresses = CourseProgress.objects.filter(student=student)
-            if course_progresses.exists():
-                avg_progress = course_progresses.aggregate(Avg('progress_percentage'))['progress_percentage__avg'] or 0
-                gpa = (avg_progress / 100) * 4.0  # Convert percentage to 4.0 scale
-            else:
-                gpa = 0.0
-            
-            # Get enrollment date (earliest enrollment)
-            if enrollments.exists():
-                enrollment_date = enrollments.earliest('enrollment_date').enrollment_date
-            else:
-                enrollment_date = student.date_joined
-            
-            student_data.append({
-                'id': student.id,
-                'name': f"{student.first_name} {student.last_name}",
-                'email': student.email,
-                'studentId': student.username,  # Using username as student ID
-                'enrollmentDate': enrollment_date.isoformat(),
-                'program': 'General Studies',  # Default program
-                'status': 'Active' if student.is_active else 'Inactive',
-                'gpa': round(gpa, 2),
-                'totalCourses': total_courses,
-            })
+        enrollments = CourseEnrollment.objects.filter(student=OuterRef('pk')).order_by().values('student')
+        progress = CourseProgress.objects.filter(student=OuterRef('pk')).order_by().values('student')
+        students = User.objects.filter(user_type='student').annotate(
+            total_courses=Coalesce(Subquery(enrollments.annotate(total=Count('pk')).values('total')), 0),
+            first_enrollment=Subquery(enrollments.annotate(first=Min('enrollment_date')).values('first')),
+            average_progress=Subquery(
+                progress.annotate(average=Avg('progress_percentage')).values('average'),
+                output_field=FloatField()
+            ),
+        )
         
-        return Response(student_data)
+        search = self.request.query_params.get('search', '').strip()
+        if search:
+            students = students.filter(
+                Q(first_name__icontains=search) | Q(last_name__icontains=search) |
+                Q(email__icontains=search) | Q(username__icontains=search)
+            )
+        return students
 
 class StaffDashboardStatsView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
@@ -112,39 +110,17 @@ class StaffDashboardStatsView(APIView):
         if request.user.user_type != 'teacher':
             return Response({"detail": "Not authorized"}, status=status.HTTP_403_FORBIDDEN)
         
-        # Get total students
-        total_students = User.objects.filter(user_type='student').count()
-        
-        # Get total courses
-        total_courses = Course.objects.filter(instructor=request.user).count()
-        
-        # Get total exams
-        total_exams = Exam.objects.all().count()
-        
-        # Get active exams
-        active_exams = Exam.objects.filter(
-            is_published=True
-        ).count()
-        
-        # Get recent enrollments (last 30 days)
-        recent_enrollments = Course.objects.filter(
-            instructor=request.user,
-            created_at__gte=timezone.now() - timezone.timedelta(days=30)
-        ).count()
-        
-        # Get total revenue
-        courses = Course.objects.filter(instructor=request.user)
-        total_revenue = courses.aggregate(
-            total=Sum('price')
-        )['total'] or 0
+        # Students, enrollments, courses and revenue are the teacher's own;
+        # exam totals are site-wide. Cached briefly, see users.dashboard
+        stats = staff_dashboard(request.user.pk)
         
         return Response({
-            'total_students': total_students,
-            'total_courses': total_courses,
-            'total_exams': total_exams,
-            'active_exams': active_exams,
-            'recent_enrollments': recent_enrollments,
-            'total_revenue': total_revenue
+            'total_students': stats['total_students'],
+            'total_courses': stats['total_courses'],
+            'total_exams': stats['total_exams'],
+            'active_exams': stats['active_exams'],
+            'recent_enrollments': stats['recent_enrollments'],
+            'total_revenue': stats['total_revenue']
         })
 
 class ExaminationTypeListView(generics.ListAPIView):